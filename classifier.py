@@ -1,10 +1,41 @@
 import utils
 import os
 from llm_compare import check_consistency_with_groq
-from dataclasses import dataclass
+from decision_cache import DecisionCache, fingerprint
+from corpus_pack import PackedCorpus
+from result_log import ResultLog, jsonable, new_run_id
+from mrz import MRZ, MRZError, NATIONALITY_CODES, to_mrz_name
+from document_bundle import DocumentBundle
+from dataclasses import dataclass, field
+from functools import partial
+import hashlib
 import re
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from tqdm import tqdm
-from typing import List, Dict, Any
+from sharding import (
+    merge_partials,
+    parse_shard,
+    print_summary,
+    shard_indices,
+    summarize,
+    write_partial,
+)
+from typing import List, Dict, Any, Optional
+
+# Bump whenever a change to the rules can change a decision; it is part of
+# the decision cache key, so stale cached decisions stop matching
+CLASSIFIER_VERSION = "1"
+
+# Stages of one classification; each may occupy a stage pool worker
+STAGES = ("pdf", "docx", "passport")
+
+# Characters of passport OCR text kept with a conflict; the whole page is
+# identified by its hash instead
+OCR_EXCERPT_CHARS = 120
 
 
 @dataclass
@@ -15,8 +46,8 @@ class Address:
     city: str
     country: str
 
-    @staticmethod
-    def from_string(text: str, country: str = "") -> "Address":
+    @classmethod
+    def from_string(cls, text: str, country: str = "") -> "Address":
         """
         Parse address from a string format.
 
@@ -56,7 +87,7 @@ class Address:
         else:
             city = city_part.strip()
 
-        return Address(
+        return cls(
             building_number=building_number,
             street_name=street_name,
             postal_code=postal_code,
@@ -68,17 +99,77 @@ class Address:
 class Person:
     """
     Class for loading and verifying person data from multiple document sources.
+
+    Rule experiments (see rule_runner.py) subclass Person and override the
+    checks, ``address_type`` or ``normalize_phone``.
     """
 
-    def __init__(self, client_path: str):
-        """Initialize paths to the person's documents."""
+    # Address type whose from_string parses the DOCX address
+    address_type = Address
+
+    def __init__(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        bundle: Optional[DocumentBundle] = None,
+    ):
+        """
+        Initialize paths to the person's documents.
+
+        Args:
+            client_path: Directory holding the documents
+            documents: In-memory buffers by document field (e.g. from a
+                PackedCorpus), used instead of the files in client_path
+            bundle: Shared parsed views of the documents; created from
+                client_path and documents if None
+        """
         self.client_path = client_path
-        self.pdf_path = os.path.join(client_path, "account.pdf")
-        self.passport_path = os.path.join(client_path, "passport.png")
-        self.docx_path = os.path.join(client_path, "profile.docx")
-        self.description_path = os.path.join(client_path, "description.txt")
+        self.bundle = bundle or DocumentBundle(client_path, documents)
+        self.pdf_path = self.bundle.pdf_path
+        self.passport_path = self.bundle.passport_path
+        self.docx_path = self.bundle.docx_path
+        self.description_path = self.bundle.description_path
 
         self.data: Dict[str, Any] = {}
+        self.mismatches: List[str] = []
+
+        # Document each data field was first read from, and for every
+        # mismatched field the conflicting values by document
+        self.data_sources: Dict[str, str] = {}
+        self.conflicts: Dict[str, Dict[str, Any]] = {}
+        self._source = "data"
+
+        # Set when a check could not be evaluated (e.g. unreadable document,
+        # missing Tesseract) rather than finding a mismatch
+        self.error: Optional[str] = None
+
+    def _fail(self, message: str, error: Exception) -> bool:
+        """Record that a check raised instead of comparing; returns False."""
+        print(f"{message}: {error}")
+        self.error = f"{type(error).__name__}: {error}"
+        return False
+
+    def _mismatch(self, field: str, source: str, value: Any) -> bool:
+        """Record a field whose value in ``source`` conflicts; returns False."""
+        self.mismatches.append(field)
+        self.conflicts[field] = {
+            self.data_sources.get(field, "data"): self.data.get(field),
+            source: value,
+        }
+        return False
+
+    def _text_mismatch(self, field: str, text: str, searched: str) -> bool:
+        """
+        Record a field not found in passport OCR text; returns False.
+        Keeps what was searched for and a bounded excerpt of the page.
+        """
+        page = " ".join(text.split())
+        found = {
+            "searched": searched,
+            "ocr_excerpt": page[:OCR_EXCERPT_CHARS],
+            "ocr_sha256": hashlib.sha256(text.encode()).hexdigest()[:16],
+        }
+        return self._mismatch(field, "passport", found)
 
     def compare_or_set(self, field: str, value: Any) -> bool:
         """
@@ -87,16 +178,24 @@ class Person:
         """
         if field not in self.data:
             self.data[field] = value
+            self.data_sources[field] = self._source
             return True
-        return self.data[field] == value
+        if self.data[field] != value:
+            return self._mismatch(field, self._source, value)
+        return True
 
-    def load_pdf(self) -> bool:
+    def load_pdf(self, pdf_fields: Optional[Dict[str, Any]] = None) -> bool:
         """
         Load and validate data from PDF document.
         Returns True if data is consistent with existing data.
+
+        Args:
+            pdf_fields: Already extracted form fields; read from disk if None
         """
         try:
-            pdf_fields = utils.extract_pdf(self.pdf_path)
+            if pdf_fields is None:
+                pdf_fields = self.bundle.pdf_fields()
+            self._source = "pdf"
             checks = []
 
             # Compare or set basic identity fields
@@ -114,7 +213,7 @@ class Person:
             )
 
             # Normalize phone number (remove spaces)
-            phone = pdf_fields.get("phone_number", "").replace(" ", "")
+            phone = self.normalize_phone(pdf_fields.get("phone_number", ""))
             checks.append(self.compare_or_set("phone", phone))
 
             # Email
@@ -125,7 +224,7 @@ class Person:
             checks.append(self.compare_or_set("currency", currency))
 
             # Address
-            address = Address(
+            address = self.address_type(
                 building_number=pdf_fields.get("building_number", ""),
                 street_name=pdf_fields.get("street_name", ""),
                 postal_code=pdf_fields.get("postal_code", ""),
@@ -137,8 +236,12 @@ class Person:
             return all(checks)
 
         except Exception as e:
-            print(f"Error loading PDF from {self.pdf_path}: {e}")
-            return False
+            return self._fail(f"Error loading PDF from {self.pdf_path}", e)
+
+    @staticmethod
+    def normalize_phone(phone: str) -> str:
+        """Normalize the PDF phone number for comparison."""
+        return phone.replace(" ", "")
 
     def _extract_currency(self, pdf_fields: Dict[str, str]) -> str:
         """Extract currency from PDF fields."""
@@ -147,13 +250,18 @@ class Person:
                 return code.upper()
         return pdf_fields.get("other_ccy", "").upper()
 
-    def load_docx(self) -> bool:
+    def load_docx(self, docx_data: Optional[Dict[str, Any]] = None) -> bool:
         """
         Load and validate data from DOCX document.
         Returns True if data is consistent with existing data.
+
+        Args:
+            docx_data: Already parsed profile fields; read from disk if None
         """
         try:
-            docx_data = utils.parse_docx(self.docx_path)
+            if docx_data is None:
+                docx_data = self.bundle.docx_fields()
+            self._source = "docx"
             checks = []
 
             # Build and check full name
@@ -178,7 +286,9 @@ class Person:
 
             # Parse and check address
             country = docx_data.get("country_of_domicile", "").strip()
-            address = Address.from_string(docx_data.get("address", ""), country=country)
+            address = self.address_type.from_string(
+                docx_data.get("address", ""), country=country
+            )
             checks.append(self.compare_or_set("address", address))
 
             # Additional identity information
@@ -190,42 +300,130 @@ class Person:
             return all(checks)
 
         except Exception as e:
-            print(f"Error loading DOCX from {self.docx_path}: {e}")
-            return False
+            return self._fail(f"Error loading DOCX from {self.docx_path}", e)
 
-    def check_passport(self) -> bool:
+    def check_passport(self, text: Optional[str] = None) -> bool:
         """
         Validate passport image OCR text against stored person data.
         Returns True if the passport data matches the person data.
+
+        Args:
+            text: Already extracted OCR text; OCR is run if None
         """
         try:
-            text = utils.extract_text(self.passport_path)
-            normalized_text = utils.normalize_text(text).lower().replace("\n", " ")
-
+            if text is None:
+                text = self.bundle.ocr_text()
             # Check key fields in passport
-            check_fields = ["name", "surname", "passport", "nationality"]
-
-            for field in check_fields:
-                field_value = self.data.get(field, "").lower()
-                if not field_value:
-                    continue
-
-                normalized_value = utils.normalize_text(field_value)
-                masked_value = self._create_masked_value(field_value, normalized_value)
-
-                if not self._partial_match(normalized_text, masked_value):
-                    return False
+            for field in ["name", "surname", "passport", "nationality"]:
+                if not self._found_in_text(text, field):
+                    return self._text_mismatch(field, text, self._searched_value(field))
 
             # Check gender marker
             expected_sex = "M" if self.data.get("gender") == "male" else "F"
             if expected_sex not in text:
-                return False
+                return self._text_mismatch("gender", text, expected_sex)
 
             return True
 
         except Exception as e:
-            print(f"Error checking passport from {self.passport_path}: {e}")
-            return False
+            return self._fail(f"Error checking passport from {self.passport_path}", e)
+
+    def check_passport_mrz(self) -> bool:
+        """
+        Validate the passport's machine-readable zone against stored data.
+        Falls back to full-page OCR if no valid MRZ can be read.
+        """
+        try:
+            mrz = self.bundle.mrz()
+        except MRZError as e:
+            print(f"No valid MRZ in {self.passport_path} ({e}), using full OCR")
+            return self.check_passport()
+        except Exception as e:
+            return self._fail(f"Error checking passport from {self.passport_path}", e)
+
+        return self.check_mrz(mrz)
+
+    def check_mrz(self, mrz: MRZ, text: Optional[str] = None) -> bool:
+        """
+        Compare check-digit validated MRZ fields with stored person data.
+        Returns True if every available field matches exactly.
+
+        A nationality without a known ICAO code is checked against the
+        full-page OCR text instead, as check_passport does.
+
+        Args:
+            mrz: Parsed MRZ of the passport
+            text: Full-page OCR text; OCR is run if None and it is needed
+        """
+        # Names: the MRZ name field is 39 characters and may be truncated
+        mrz_name = f"{mrz.surname}<<{mrz.given_names}".rstrip("<")
+        surname, name = self.data.get("surname", ""), self.data.get("name", "")
+        if surname or name:
+            candidates = {
+                f"{to_mrz_name(surname, icao)}<<{to_mrz_name(name, icao)}"[:39]
+                for icao in (False, True)
+            }
+            if mrz_name not in {c.rstrip("<") for c in candidates}:
+                return self._mismatch("name", "passport", mrz_name)
+
+        passport = self.data.get("passport", "")
+        if passport and mrz.document_number != passport.upper():
+            return self._mismatch("passport", "passport", mrz.document_number)
+
+        nationality, code = self._nationality_code()
+        if len(code) == 3:
+            nationality_ok = mrz.nationality == code
+        elif nationality:
+            try:
+                if text is None:
+                    text = self.bundle.ocr_text()
+            except Exception as e:
+                return self._fail(
+                    f"Error checking passport from {self.passport_path}", e
+                )
+            nationality_ok = self._found_in_text(text, "nationality")
+        else:
+            nationality_ok = True
+        if not nationality_ok:
+            if len(code) == 3:
+                return self._mismatch("nationality", "passport", mrz.nationality)
+            searched = self._searched_value("nationality")
+            return self._text_mismatch("nationality", text, searched)
+
+        expected_sex = "M" if self.data.get("gender") == "male" else "F"
+        if mrz.sex != expected_sex:
+            return self._mismatch("gender", "passport", mrz.sex)
+        return True
+
+    def _nationality_code(self):
+        """Stored nationality and its ICAO code (the upper-cased name if unknown)."""
+        nationality = (self.data.get("nationality") or "").strip()
+        return nationality, NATIONALITY_CODES.get(
+            nationality.lower(), nationality.upper()
+        )
+
+    def mrz_needs_text(self) -> bool:
+        """Whether check_mrz has to search the full-page OCR for the nationality."""
+        nationality, code = self._nationality_code()
+        return bool(nationality) and len(code) != 3
+
+    def _found_in_text(self, text: str, field: str) -> bool:
+        """
+        Fuzzy-check that a stored field appears in passport OCR text.
+        Empty fields always pass.
+        """
+        masked_value = self._searched_value(field)
+        if not masked_value:
+            return True
+
+        normalized_text = utils.normalize_text(text).lower().replace("\n", " ")
+        return self._partial_match(normalized_text, masked_value)
+
+    def _searched_value(self, field: str) -> str:
+        """Normalized stored field as searched for in OCR text; "*" marks diacritics."""
+        field_value = (self.data.get(field) or "").lower()
+        normalized_value = utils.normalize_text(field_value)
+        return self._create_masked_value(field_value, normalized_value)
 
     def _create_masked_value(self, original: str, normalized: str) -> str:
         """Create a string with wildcards for diacritic characters."""
@@ -252,66 +450,506 @@ class Person:
         return any(self._match_with_wildcards(text, pat) for pat in patterns)
 
 
+@dataclass
+class ClassificationResult:
+    """Decision for one client together with the reason and stage timings."""
+
+    decision: bool
+    failed_stage: Optional[str] = None
+    mismatches: List[str] = field(default_factory=list)
+    # Conflicting values of each mismatched field, by document
+    conflicts: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+    deadline_hit: Optional[str] = None
+    # Why a stage could not be evaluated; such results are never cached
+    error: Optional[str] = None
+
+    @property
+    def reason(self) -> str:
+        """Human-readable rejection reason; empty for accepted clients."""
+        if self.deadline_hit:
+            return (
+                f"{self.failed_stage} stage exceeded the {self.deadline_hit} deadline"
+            )
+        if self.error:
+            return f"{self.failed_stage} stage error: {self.error}"
+        if self.decision or self.failed_stage is None:
+            return ""
+        if self.mismatches:
+            return f"{self.failed_stage} mismatch: {', '.join(self.mismatches)}"
+        return f"{self.failed_stage} check failed"
+
+
+@dataclass
+class Deadlines:
+    """
+    Time budgets in seconds for the classification stages.
+
+    Stage budgets count from the moment the stage starts running, so time
+    spent queued for a stage worker does not count; ``total`` counts from
+    the start of classification. None disables a limit. When a budget
+    runs out the client gets ``fallback_decision``; rejecting is the safe
+    default for onboarding.
+    """
+
+    pdf: Optional[float] = None
+    docx: Optional[float] = None
+    passport: Optional[float] = None
+    total: Optional[float] = None
+    fallback_decision: bool = False
+
+    def remaining(
+        self, stage: str, stage_start: float, start: float
+    ) -> Optional[float]:
+        """Seconds left for a stage, or None if it is unbounded."""
+        now = time.perf_counter()
+        limits = []
+        if getattr(self, stage) is not None:
+            limits.append(stage_start + getattr(self, stage) - now)
+        if self.total is not None:
+            limits.append(start + self.total - now)
+        return min(limits) if limits else None
+
+    def remaining_total(self, start: float) -> Optional[float]:
+        """Seconds left of the total budget, or None if it is unbounded."""
+        if self.total is None:
+            return None
+        return start + self.total - time.perf_counter()
+
+    def exceeded(self, stage: str, stage_start: float, start: float) -> str:
+        """Name of the budget that ran out: the stage's own or "total"."""
+        if self.total is not None and time.perf_counter() >= start + self.total:
+            return "total"
+        return stage
+
+
+def _timed(fn, *args, **kwargs):
+    """Call fn and return its result with the elapsed seconds."""
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
 class Classifier:
     """
     Classifier for verifying consistency across multiple document sources.
     """
 
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        parallel_stages: bool = False,
+        max_workers: int = 4,
+        use_mrz: bool = False,
+        cache: Optional[DecisionCache] = None,
+        deadlines: Optional[Deadlines] = None,
+    ):
+        """
+        Initialize the classifier.
+
+        Args:
+            parallel_stages: Run PDF, DOCX and passport OCR concurrently
+            max_workers: Size of the stage thread pool in parallel mode; give
+                len(STAGES) per concurrent classify call so stages never
+                queue behind other clients
+            use_mrz: Verify the passport through its MRZ instead of full OCR
+            cache: Decision cache consulted before any document is parsed
+            deadlines: Per-stage and overall time budgets
+        """
+        self.parallel_stages = parallel_stages
+        self.use_mrz = use_mrz
+        self.cache = cache
+        self.deadlines = deadlines
+        ocr_profile = ",".join(f"{k}={v}" for k, v in utils.load_ocr_profile().items())
+        self.version = f"{CLASSIFIER_VERSION}:mrz={int(use_mrz)}:{ocr_profile}"
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers)
+            if parallel_stages or deadlines
+            else None
+        )
+
+        # Deadline hits by budget name ("pdf", "docx", "passport", "total")
+        self.deadline_hits: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
 
-    def classify(self, client_path: str) -> bool:
+    def classify(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        bundle: Optional[DocumentBundle] = None,
+    ) -> bool:
         """
         Classify whether client documents are consistent.
         Returns True if documents pass validation.
+
+        Args:
+            client_path: Directory holding the client documents
+            documents: In-memory document buffers, used instead of files
+            bundle: Parsed views shared with the caller (e.g. the UI)
+        """
+        return self.classify_detailed(client_path, documents, bundle).decision
+
+    def classify_detailed(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        bundle: Optional[DocumentBundle] = None,
+    ) -> ClassificationResult:
         """
-        person = Person(client_path=client_path)
-        return person.load_pdf() and person.load_docx() and person.check_passport()
+        Classify client documents and report why and how long it took.
 
-    def llm_compare(self, pdf_path: str, docx_path: str) -> bool:
+        Args:
+            client_path: Directory holding the client documents
+            documents: In-memory document buffers, used instead of files
+            bundle: Parsed views shared with the caller (e.g. the UI)
+        """
+        bundle = bundle or DocumentBundle(client_path, documents)
+        if self.cache is None:
+            return self._classify(bundle)
+
+        key = fingerprint(bundle.client_path, self.version, bundle.documents)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return ClassificationResult(**entry, cached=True)
+
+        result = self._classify(bundle)
+        # Deadline hits and errors say nothing lasting about the documents
+        if not result.deadline_hit and not result.error:
+            self.cache.put(key, result.decision, result.failed_stage, result.mismatches)
+        return result
+
+    def _classify(self, bundle: DocumentBundle) -> ClassificationResult:
+        """Run the classification pipeline without consulting the cache."""
+        if self.parallel_stages or self.deadlines:
+            return self._classify_staged(bundle)
+
+        person = Person(client_path=bundle.client_path, bundle=bundle)
+        check_passport = (
+            person.check_passport_mrz if self.use_mrz else person.check_passport
+        )
+        result = ClassificationResult(decision=False)
+
+        for stage, check in [
+            ("pdf", person.load_pdf),
+            ("docx", person.load_docx),
+            ("passport", check_passport),
+        ]:
+            passed, result.timings[stage] = _timed(check)
+            if not passed:
+                result.failed_stage = stage
+                result.mismatches = person.mismatches
+                result.conflicts = person.conflicts
+                result.error = person.error
+                return result
+
+        result.decision = True
+        return result
+
+    def _classify_staged(self, bundle: DocumentBundle) -> ClassificationResult:
+        """
+        Classify with extraction running on the stage pool.
+
+        In parallel mode all stages start up front: passport preprocessing/OCR
+        runs alongside PDF and DOCX parsing, so latency approaches the slowest
+        stage instead of the sum. Otherwise each stage starts when the
+        previous one has passed. As soon as a stage reports a mismatch or
+        runs out of time the remaining work is cancelled: queued stages never
+        start and running Tesseract processes are killed. With deadlines,
+        PDF and DOCX parsing runs in pooled worker processes that are killed the
+        same way, so an overrunning parse never keeps a pool thread.
+        """
+        person = Person(client_path=bundle.client_path, bundle=bundle)
+        deadlines = self.deadlines or Deadlines()
+        cancelled = threading.Event()
+        result = ClassificationResult(decision=False)
+        start = time.perf_counter()
+
+        read_passport = bundle.mrz if self.use_mrz else bundle.ocr_text
+        extractors = {
+            "pdf": (bundle.pdf_fields, bundle.pdf_path, "loading PDF"),
+            "docx": (bundle.docx_fields, bundle.docx_path, "loading DOCX"),
+            "passport": (read_passport, bundle.passport_path, "checking passport"),
+        }
+        checks = {
+            "pdf": person.load_pdf,
+            "docx": person.load_docx,
+            "passport": person.check_mrz if self.use_mrz else person.check_passport,
+        }
+        futures: Dict[str, Any] = {}
+
+        # Parsers only need to be killable when something can time them out
+        isolate = self.deadlines is not None
+
+        def submit(stage: str, extract=None, resume: bool = False) -> None:
+            # A resumed stage keeps its previous task's clock, and so its budget
+            extract = extract or extractors[stage][0]
+            origin = futures[stage][1]["start"] if resume else None
+            task = {"started": threading.Event(), "start": None}
+
+            def run():
+                # The stage clock starts when a worker picks the stage up
+                task["start"] = origin or time.perf_counter()
+                task["started"].set()
+                kwargs = {}
+                if stage == "passport" or isolate:
+                    kwargs = {
+                        "cancel_event": cancelled,
+                        "timeout": deadlines.remaining(stage, task["start"], start),
+                    }
+                return _timed(extract, **kwargs)
+
+            futures[stage] = (self._executor.submit(run), task)
+
+        def wait(stage: str):
+            future, task = futures[stage]
+            # Time queued for a worker only counts against the total budget
+            if not task["started"].wait(deadlines.remaining_total(start)):
+                raise TimeoutError("total")
+            try:
+                return future.result(
+                    timeout=deadlines.remaining(stage, task["start"], start)
+                )
+            except (TimeoutError, FuturesTimeoutError):
+                raise TimeoutError(deadlines.exceeded(stage, task["start"], start))
+
+        if self.parallel_stages:
+            for stage in STAGES:
+                submit(stage)
+
+        try:
+            for stage, (_, path, action) in extractors.items():
+                result.failed_stage = stage
+                check = checks[stage]
+                if stage not in futures:
+                    submit(stage)
+
+                try:
+                    try:
+                        extracted, seconds = wait(stage)
+                    except MRZError as e:
+                        print(f"No valid MRZ in {path} ({e}), using full OCR")
+                        mrz_seconds = time.perf_counter() - futures[stage][1]["start"]
+                        submit(stage, bundle.ocr_text, resume=True)
+                        check = person.check_passport
+                        extracted, seconds = wait(stage)
+                        seconds += mrz_seconds
+                    if check == person.check_mrz and person.mrz_needs_text():
+                        # Nationalities without an ICAO code are searched for
+                        # in the full OCR, still within the passport budget
+                        mrz_seconds = seconds
+                        submit(stage, bundle.ocr_text, resume=True)
+                        text, seconds = wait(stage)
+                        seconds += mrz_seconds
+                        check = partial(person.check_mrz, text=text)
+                except TimeoutError as e:
+                    return self._deadline_hit(result, str(e), deadlines)
+                except Exception as e:
+                    print(f"Error {action} from {path}: {e}")
+                    result.error = f"{type(e).__name__}: {e}"
+                    return result
+
+                passed, check_seconds = _timed(check, extracted)
+                result.timings[stage] = seconds + check_seconds
+                if not passed:
+                    result.mismatches = person.mismatches
+                    result.conflicts = person.conflicts
+                    result.error = person.error
+                    return result
+
+            result.failed_stage = None
+            result.decision = True
+            return result
+
+        finally:
+            cancelled.set()
+            for future, _ in futures.values():
+                future.cancel()
+
+    def _deadline_hit(
+        self, result: ClassificationResult, budget: str, deadlines: Deadlines
+    ) -> ClassificationResult:
+        """Apply the fallback policy and count the deadline hit."""
+        with self._stats_lock:
+            self.deadline_hits[budget] = self.deadline_hits.get(budget, 0) + 1
+        result.deadline_hit = budget
+        result.decision = deadlines.fallback_decision
+        return result
+
+    def llm_compare(self, bundle: DocumentBundle) -> bool:
         """
         Use LLM to compare documents for consistency.
         Returns True if LLM determines documents are consistent.
+
+        Args:
+            bundle: Client documents; reuses fields already parsed by classify
         """
-        pdf_data = utils.extract_pdf(pdf_path)
-        docx_data = utils.parse_docx(docx_path)
+        pdf_data = bundle.pdf_fields()
+        docx_data = bundle.docx_fields()
         result = check_consistency_with_groq(docx_data, pdf_data)
         print(result)
         return True
 
 
-def run_validation(num_clients=3000, batch_log_interval=50):
-    """Run validation on client data and print statistics."""
-    total = success = false_positives = false_negatives = 0
+def run_validation(
+    num_clients=3000,
+    batch_log_interval=50,
+    parallel_stages=False,
+    shard=(0, 1),
+    output_path=None,
+    use_mrz=False,
+    cache_path=None,
+    corpus_path=None,
+    deadlines=None,
+    log_path=None,
+):
+    """
+    Run validation on client data and print statistics.
+
+    Args:
+        num_clients: Size of the client corpus
+        batch_log_interval: Print running accuracy every N clients
+        parallel_stages: Run classifier stages concurrently
+        shard: (i, n) tuple; only every n-th client starting at i is validated
+        output_path: Write per-client results here for a later merge
+        use_mrz: Verify passports through the MRZ
+        cache_path: Persistent decision cache file
+        corpus_path: Packed corpus (see corpus_pack.py) read instead of
+            the client_data/ folders
+        deadlines: Deadlines applied to every client
+        log_path: Append one record per client to this JSONL file
+            (see result_log.py)
+    """
+    total = success = 0
+    records = []
+    cache = DecisionCache(path=cache_path) if cache_path else None
+    classifier = Classifier(
+        parallel_stages=parallel_stages,
+        use_mrz=use_mrz,
+        cache=cache,
+        deadlines=deadlines,
+    )
+
+    corpus = PackedCorpus(corpus_path) if corpus_path else None
+    log = ResultLog(log_path, run_id=new_run_id()) if log_path else None
 
     print("Starting validation...\n")
 
-    for i in tqdm(range(num_clients), desc="Validating", unit="client"):
+    indices = shard_indices(num_clients, shard)
+    for i in tqdm(indices, desc="Validating", unit="client"):
         path = f"client_data/client_{i + 1}/"
-        if not os.path.isdir(path):
+        documents = None
+        if corpus is not None:
+            if i + 1 not in corpus:
+                continue
+            documents = corpus.documents(i + 1)
+        elif not os.path.isdir(path):
             continue
 
-        total += 1
-        person = Person(path)
-        result = person.load_pdf() and person.load_docx() and person.check_passport()
+        start = time.perf_counter()
+        detailed = classifier.classify_detailed(path, documents)
+        result = detailed.decision
         expected = (i % 1000) < 500
+        record = {
+            "client": i,
+            "result": result,
+            "expected": expected,
+            "seconds": time.perf_counter() - start,
+            "failed_stage": detailed.failed_stage,
+            "mismatches": detailed.mismatches,
+            "conflicts": jsonable(detailed.conflicts),
+            "timings": detailed.timings,
+            "cached": detailed.cached,
+            "deadline_hit": detailed.deadline_hit,
+            "error": detailed.error,
+        }
+        records.append(record)
+        if log is not None:
+            log.write(record)
 
+        total += 1
         success += result == expected
-        false_negatives += int(not result and expected)
-        false_positives += int(result and not expected)
 
         if i % batch_log_interval == 0 and i > 0:
             print(
                 f"  └─ Processed {i} clients | Current Accuracy: {success}/{total} ({(success/total)*100:.2f}%)"
             )
 
-    print("\n=== Validation Summary ===")
-    print(f"Total Clients     : {total}")
-    print(f"Correct Predictions: {success}")
-    print(f"False Negatives   : {false_negatives}")
-    print(f"False Positives   : {false_positives}")
-    print(f"Accuracy          : {(success / total * 100):.2f}%\n")
+    if log is not None:
+        log.close()
+        print(f"Logged {len(records)} results to {log_path} (run {log.run_id})")
+
+    if output_path:
+        write_partial(output_path, shard, num_clients, records)
+        print(f"Wrote {len(records)} results to {output_path}")
+
+    summary = summarize(records)
+    print_summary(summary)
+    return summary
+
+
+def merge_validation(paths, allow_partial=False):
+    """Merge partial results from sharded runs and print the summary."""
+    records = merge_partials(paths, allow_partial)
+    summary = summarize(records)
+    print_summary(summary)
+    return summary
+
+
+def deadlines_from_args(args) -> Optional[Deadlines]:
+    """Build Deadlines from --stage-deadline/--total-deadline, if given."""
+    if args.stage_deadline is None and args.total_deadline is None:
+        return None
+    return Deadlines(
+        pdf=args.stage_deadline,
+        docx=args.stage_deadline,
+        passport=args.stage_deadline,
+        total=args.total_deadline,
+    )
 
 
 if __name__ == "__main__":
-    run_validation()
+    parser = argparse.ArgumentParser(description="Validate the classifier.")
+    parser.add_argument("--num-clients", type=int, default=3000)
+    parser.add_argument(
+        "--parallel", action="store_true", help="run classifier stages concurrently"
+    )
+    parser.add_argument(
+        "--mrz", action="store_true", help="verify passports through the MRZ"
+    )
+    parser.add_argument("--cache", help="persistent decision cache file")
+    parser.add_argument(
+        "--stage-deadline", type=float, help="time budget per stage in seconds"
+    )
+    parser.add_argument(
+        "--total-deadline", type=float, help="time budget per client in seconds"
+    )
+    parser.add_argument("--corpus", help="packed corpus file (see corpus_pack.py)")
+    parser.add_argument(
+        "--shard", type=parse_shard, default=(0, 1), help="validate shard i of n (i/n)"
+    )
+    parser.add_argument("--output", help="write per-client results to this file")
+    parser.add_argument("--log", help="append per-client records to this JSONL file")
+    parser.add_argument(
+        "--merge", nargs="+", metavar="PARTIAL", help="merge shard results and exit"
+    )
+    parser.add_argument(
+        "--allow-partial",
+        action="store_true",
+        help="with --merge, summarize even if some shards are missing",
+    )
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_validation(args.merge, args.allow_partial)
+    else:
+        run_validation(
+            num_clients=args.num_clients,
+            parallel_stages=args.parallel,
+            shard=args.shard,
+            output_path=args.output,
+            use_mrz=args.mrz,
+            cache_path=args.cache,
+            corpus_path=args.corpus,
+            deadlines=deadlines_from_args(args),
+            log_path=args.log,
+        )
@@ -0,0 +1,380 @@
+"""
+Warm classification service.
+Keeps a Classifier (imports, thread pools, decision cache) alive in one
+long-running process and serves decisions over HTTP on a Unix socket, so
+game players and the Streamlit app only pay a local round trip per client.
+
+Usage:
+    python3 classifier_service.py --socket /tmp/bigbank-classifier.sock
+
+Endpoints:
+    POST /classify  {"client_data": {...base64 documents...}}
+                    or {"client_path": "/abs/dir/with/documents"}
+                    optionally with "views": {...already parsed views...}
+    GET  /health
+    GET  /stats
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Optional
+
+from classifier import STAGES, Classifier, Deadlines, deadlines_from_args
+from decision_cache import DecisionCache
+from document_bundle import DocumentBundle
+from rate_control import RateController
+from result_log import jsonable
+from utils import DOCUMENT_FILES
+
+DEFAULT_SOCKET = "/tmp/bigbank-classifier.sock"
+
+
+class ClassificationService:
+    """
+    Bounded worker pool in front of a warm Classifier.
+
+    At most ``max_workers`` clients are classified at once and at most
+    ``max_queue`` more may wait; anything beyond that is refused so callers
+    can back off instead of piling up.
+    """
+
+    def __init__(
+        self, classifier: Classifier, max_workers: int = 4, max_queue: int = 16
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            classifier: Classifier kept warm across requests
+            max_workers: Number of clients classified concurrently
+            max_queue: Number of requests allowed to wait for a worker
+        """
+        self.classifier = classifier
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0, "seconds": 0.0}
+
+    def submit(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Classify one client payload.
+        Returns None if the service is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            return None
+
+        try:
+            return self._pool.submit(self._classify, payload).result()
+        finally:
+            self._slots.release()
+
+    def _classify(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        client_path = payload.get("client_path", "")
+        documents = None
+
+        if "client_data" in payload:
+            client_data = payload["client_data"]
+            documents = {
+                field: base64.b64decode(client_data[field])
+                for field in DOCUMENT_FILES
+                if field in client_data
+            }
+
+        # Views the caller already parsed (e.g. the UI's DOCX fields)
+        bundle = DocumentBundle(client_path, documents, payload.get("views"))
+        result = self.classifier.classify_detailed(client_path, documents, bundle)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["seconds"] += elapsed
+
+        return {
+            "decision": "Accept" if result.decision else "Reject",
+            "accept": result.decision,
+            "reason": result.reason,
+            "failed_stage": result.failed_stage,
+            "mismatches": result.mismatches,
+            "conflicts": jsonable(result.conflicts),
+            "timings": {**result.timings, "total": elapsed},
+            "cached": result.cached,
+            "deadline_hit": result.deadline_hit,
+            "error": result.error,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Request counters plus the classifier's deadline hits."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self.classifier._stats_lock:
+            stats["deadline_hits"] = dict(self.classifier.deadline_hits)
+        return stats
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "UnixHTTPServer"
+
+    def address_string(self) -> str:
+        # Unix socket peers have no host/port
+        return "unix"
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers=None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, self.server.service.snapshot())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path != "/classify":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._count_error()
+            self._send_json(400, {"error": f"bad request: {e}"})
+            return
+
+        try:
+            response = self.server.service.submit(payload)
+        except Exception as e:
+            self._count_error()
+            self._send_json(500, {"error": str(e)})
+            return
+
+        if response is None:
+            self._send_json(503, {"error": "busy"}, {"Retry-After": "1"})
+        else:
+            self._send_json(200, response)
+
+    def _count_error(self) -> None:
+        with self.server.service._stats_lock:
+            self.server.service.stats["errors"] += 1
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: ClassificationService, verbose=False):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.socket_path = socket_path
+        self.service = service
+        self.verbose = verbose
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """
+    Thin client for the classification service.
+
+    Offers the same classify() signature as Classifier, so callers can use
+    either interchangeably; request_classification() returns the service's
+    full JSON response. A busy service (503) is retried after its
+    Retry-After delay, paced by a RateController.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        timeout: float = 120.0,
+        max_retries: int = 10,
+        rate_controller: Optional[RateController] = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            socket_path: Unix socket the service listens on
+            timeout: Socket timeout per request in seconds
+            max_retries: Number of times a busy response is retried
+            rate_controller: Pacing shared with other callers, if any
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.rate_controller = rate_controller or RateController()
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_controller.wait()
+            connection = _UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+            try:
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+                result = json.loads(response.read())
+            finally:
+                connection.close()
+
+            self.rate_controller.record(
+                response.status, response.getheader("Retry-After")
+            )
+            if response.status != 503 or attempt == self.max_retries:
+                break
+
+        if response.status != 200:
+            raise RuntimeError(f"Classifier service error {response.status}: {result}")
+        return result
+
+    def classify_payload(self, client_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Classify base64-encoded client documents."""
+        return self._request("POST", "/classify", {"client_data": client_data})
+
+    def request_classification(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        bundle: Optional[DocumentBundle] = None,
+    ) -> Dict[str, Any]:
+        """
+        Classify one client and return the service's response.
+
+        Args:
+            client_path: Directory holding the documents, readable by the service
+            documents: In-memory document buffers, sent instead of the path
+            bundle: Views parsed so far are sent along, so the service does
+                not parse those documents again
+        """
+        if documents is not None:
+            payload = {
+                "client_data": {
+                    field: base64.b64encode(bytes(buffer)).decode()
+                    for field, buffer in documents.items()
+                }
+            }
+        else:
+            payload = {"client_path": os.path.abspath(client_path)}
+        if bundle is not None:
+            payload["views"] = bundle.shareable_views()
+        return self._request("POST", "/classify", payload)
+
+    def classify(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        bundle: Optional[DocumentBundle] = None,
+    ) -> bool:
+        """
+        Classify whether client documents are consistent; True means accept.
+
+        Args:
+            client_path: Directory holding the documents, readable by the service
+            documents: In-memory document buffers, sent instead of the path
+            bundle: Parsed views shared with the caller (e.g. the UI)
+        """
+        return self.request_classification(client_path, documents, bundle)["accept"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request("GET", "/stats")
+
+
+def serve(
+    socket_path: str = DEFAULT_SOCKET,
+    max_workers: int = 4,
+    max_queue: int = 16,
+    parallel_stages: bool = False,
+    use_mrz: bool = False,
+    cache_path: Optional[str] = None,
+    deadlines: Optional[Deadlines] = None,
+    verbose: bool = False,
+) -> None:
+    """Run the classification service until interrupted."""
+    classifier = Classifier(
+        parallel_stages=parallel_stages,
+        # One stage worker per stage of every concurrently classified client
+        max_workers=len(STAGES) * max_workers,
+        use_mrz=use_mrz,
+        cache=DecisionCache(path=cache_path),
+        deadlines=deadlines,
+    )
+    service = ClassificationService(classifier, max_workers, max_queue)
+    server = UnixHTTPServer(socket_path, service, verbose=verbose)
+
+    print(f"Classifier service listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm classification service.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--mrz", action="store_true")
+    parser.add_argument("--cache", help="persistent decision cache file")
+    parser.add_argument("--stage-deadline", type=float)
+    parser.add_argument("--total-deadline", type=float)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    serve(
+        socket_path=args.socket,
+        max_workers=args.workers,
+        max_queue=args.queue,
+        parallel_stages=args.parallel,
+        use_mrz=args.mrz,
+        cache_path=args.cache,
+        deadlines=deadlines_from_args(args),
+        verbose=args.verbose,
+    )
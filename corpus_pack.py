@@ -0,0 +1,131 @@
+"""
+Packed client corpus.
+Converts the client_data/client_i/ tree into a single file with an offset
+index, and memory-maps it back so documents are handed to the decoders as
+zero-copy buffers instead of thousands of small file reads.
+
+Usage:
+    python3 corpus_pack.py client_data/ client_data.pack
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Iterator, Tuple
+
+from tqdm import tqdm
+
+from utils import DOCUMENT_FILES
+
+MAGIC = b"BBTPACK1"
+
+# Magic, then offset and length of the JSON index stored after the documents
+HEADER = struct.Struct("<8sQQ")
+
+
+def pack(source_dir: str, output_path: str) -> int:
+    """
+    Pack every client_<n>/ folder of a corpus into one file.
+
+    Args:
+        source_dir: Directory holding the client_<n>/ folders
+        output_path: Pack file to create
+    Returns the number of clients packed.
+    """
+    clients = sorted(
+        int(match.group(1))
+        for name in os.listdir(source_dir)
+        if (match := re.fullmatch(r"client_(\d+)", name))
+    )
+
+    index: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, 0, 0))
+
+        for client in tqdm(clients, desc="Packing", unit="client"):
+            client_dir = os.path.join(source_dir, f"client_{client}")
+            entry = {}
+            for field, filename in DOCUMENT_FILES.items():
+                path = os.path.join(client_dir, filename)
+                if not os.path.exists(path):
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                entry[field] = (out.tell(), len(data))
+                out.write(data)
+            index[str(client)] = entry
+
+        index_offset = out.tell()
+        index_data = json.dumps(index).encode()
+        out.write(index_data)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, index_offset, len(index_data)))
+
+    os.replace(tmp_path, output_path)
+    return len(clients)
+
+
+class PackedCorpus:
+    """
+    Read-only, memory-mapped view of a packed corpus.
+
+    Documents are returned as memoryview slices of the mapping, which
+    utils.extract_pdf, utils.parse_docx and utils.preprocess_image accept
+    directly.
+    """
+
+    def __init__(self, path: str):
+        """Map the pack file and load its index."""
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_offset, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a client corpus pack")
+
+        index = json.loads(self._mmap[index_offset : index_offset + index_length])
+        self._index = {int(client): entry for client, entry in index.items()}
+        self._view = memoryview(self._mmap)
+
+    def __contains__(self, client: int) -> bool:
+        return client in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def clients(self) -> Iterator[int]:
+        """Client numbers in the pack, in ascending order."""
+        return iter(sorted(self._index))
+
+    def documents(self, client: int) -> Dict[str, memoryview]:
+        """
+        Zero-copy buffers for one client's documents.
+
+        Args:
+            client: Client number, as in the client_<n>/ folder name
+        """
+        return {
+            field: self._view[offset : offset + length]
+            for field, (offset, length) in self._index[client].items()
+        }
+
+    def close(self) -> None:
+        """Release the mapping; buffers handed out must no longer be used."""
+        self._view.release()
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the client corpus.")
+    parser.add_argument("source_dir", help="directory with client_<n>/ folders")
+    parser.add_argument("output", help="pack file to write")
+    args = parser.parse_args()
+
+    count = pack(args.source_dir, args.output)
+    print(f"Packed {count} clients into {args.output}")
@@ -0,0 +1,216 @@
+"""
+Decision cache for the classifier.
+Decisions are keyed by a fingerprint of the four client documents, so a
+client that is seen again costs one hash instead of a full pipeline run.
+Each decision is stored with the check that rejected the client and its
+mismatched fields, so a cache hit still explains a rejection.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from utils import DOCUMENT_FILES
+
+# Fraction of the persistent capacity evicted at once when it is exceeded,
+# so the eviction query runs once per batch of puts rather than per put
+EVICTION_BATCH_FRACTION = 0.01
+
+
+def fingerprint(
+    client_path: str, version: str, documents: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Combined hash of a client's documents and the classifier version.
+
+    Args:
+        client_path: Directory holding the client documents
+        version: Classifier version/configuration the decision depends on
+        documents: In-memory document buffers, hashed instead of the files
+    """
+    digest = hashlib.sha256(version.encode())
+    for field, filename in sorted(DOCUMENT_FILES.items()):
+        digest.update(field.encode() + b"\0")
+        if documents is not None:
+            if field not in documents:
+                digest.update(b"missing\0")
+                continue
+            digest.update(hashlib.sha256(documents[field]).digest())
+            continue
+
+        path = os.path.join(client_path, filename)
+        if not os.path.exists(path):
+            digest.update(b"missing\0")
+            continue
+        document = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                document.update(block)
+        digest.update(document.digest())
+    return digest.hexdigest()
+
+
+class DecisionCache:
+    """
+    LRU cache of classification decisions and their reasons.
+
+    Lookups go to an in-process LRU first and then to an optional SQLite
+    file, which lets decisions survive across runs and be shared between
+    processes on the same host. Both tiers evict least recently used
+    entries once they exceed their capacity; the persistent tier evicts a
+    batch at a time.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        path: Optional[str] = None,
+        persistent_capacity: int = 1000000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            capacity: Maximum number of in-process entries
+            path: SQLite file for the persistent tier; in-process only if None
+            persistent_capacity: Maximum number of persistent entries
+        """
+        self.capacity = capacity
+        self.persistent_capacity = persistent_capacity
+        self._eviction_batch = max(
+            1, int(persistent_capacity * EVICTION_BATCH_FRACTION)
+        )
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions "
+                "(key TEXT PRIMARY KEY, decision INTEGER, last_used REAL, "
+                "detail TEXT)"
+            )
+            columns = {
+                row[1] for row in self._db.execute("PRAGMA table_info(decisions)")
+            }
+            if "detail" not in columns:
+                # Files from before reasons were stored; their rows read as misses
+                self._db.execute("ALTER TABLE decisions ADD COLUMN detail TEXT")
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS decisions_last_used "
+                "ON decisions (last_used)"
+            )
+            self._db.commit()
+            self._rows = self._count()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry for a fingerprint, or None.
+        An entry holds "decision", "failed_stage" and "mismatches".
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(self._entries[key])
+
+            entry = self._load(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(key, entry)
+            return self._copy(entry)
+
+    @staticmethod
+    def _copy(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """An entry the caller can change without touching the cache."""
+        return {**entry, "mismatches": list(entry["mismatches"])}
+
+    def put(
+        self,
+        key: str,
+        decision: bool,
+        failed_stage: Optional[str] = None,
+        mismatches: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Store a decision under a fingerprint.
+
+        Args:
+            key: Fingerprint of the client documents
+            decision: Whether the client was accepted
+            failed_stage: Check that rejected the client
+            mismatches: Fields that did not match
+        """
+        detail = {"failed_stage": failed_stage, "mismatches": list(mismatches or [])}
+        with self._lock:
+            self._remember(key, {"decision": decision, **detail})
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO decisions "
+                    "(key, decision, last_used, detail) VALUES (?, ?, ?, ?)",
+                    (key, int(decision), time.time(), json.dumps(detail)),
+                )
+                self._rows += 1
+                if self._rows > self.persistent_capacity:
+                    self._evict()
+                self._db.commit()
+
+    def _count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def _evict(self) -> None:
+        """
+        Drop the least recently used persistent entries, leaving room for a
+        batch of new ones. Uses the last_used index instead of sorting.
+        """
+        # Other processes may share the file, so recount before evicting
+        self._rows = self._count()
+        excess = self._rows - self.persistent_capacity + self._eviction_batch
+        if excess <= self._eviction_batch:
+            return
+        self._db.execute(
+            "DELETE FROM decisions WHERE key IN "
+            "(SELECT key FROM decisions ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._rows = self._count()
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert into the in-process LRU, evicting the oldest entry."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up the persistent tier and refresh the entry's recency."""
+        if self._db is None:
+            return None
+
+        row = self._db.execute(
+            "SELECT decision, detail FROM decisions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] is None:
+            return None
+
+        self._db.execute(
+            "UPDATE decisions SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._db.commit()
+        return {"decision": bool(row[0]), **json.loads(row[1])}
+
+    def close(self) -> None:
+        """Close the persistent store."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,188 @@
+"""
+Parsed-document bundle for one client.
+Holds the four client documents and lazily computes, then memoizes, every
+parsed view of them (PDF fields, DOCX fields, decoded and preprocessed
+passport image, OCR text, MRZ), so the classifier, the UI and the LLM path
+share one parse per document per decision.
+"""
+
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+import utils
+from mrz import MRZ, MRZError, read_mrz_image
+
+# Views that are plain JSON, so they can be handed to another process
+SHAREABLE_VIEWS = ("pdf", "docx", "ocr_text")
+
+
+class DocumentBundle:
+    """
+    The documents of one client and their memoized parsed views.
+
+    Views are computed on first use and are safe to request from several
+    threads at once: each view is computed at most once. A view whose
+    computation fails is not memoized, so it can be retried.
+    """
+
+    def __init__(
+        self,
+        client_path: str,
+        documents: Optional[Dict[str, Any]] = None,
+        views: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize document sources.
+
+        Args:
+            client_path: Directory holding the documents
+            documents: In-memory buffers by document field (e.g. from a
+                PackedCorpus), used instead of the files in client_path
+            views: Views already parsed elsewhere (see shareable_views),
+                used instead of parsing the documents again
+        """
+        self.client_path = client_path
+        self.documents = documents
+
+        if documents is not None:
+            self.sources = dict(documents)
+        else:
+            self.sources = {
+                field: os.path.join(client_path, filename)
+                for field, filename in utils.DOCUMENT_FILES.items()
+            }
+
+        self._values: Dict[str, Any] = {
+            name: value
+            for name, value in (views or {}).items()
+            if name in SHAREABLE_VIEWS
+        }
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _memoized(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Return the view called ``name``, computing it once."""
+        if name in self._values:
+            return self._values[name]
+
+        with self._locks_guard:
+            lock = self._locks[name]
+        with lock:
+            if name not in self._values:
+                self._values[name] = compute()
+            return self._values[name]
+
+    def shareable_views(self) -> Dict[str, Any]:
+        """The views in SHAREABLE_VIEWS parsed so far, by name."""
+        return {
+            name: self._values[name] for name in SHAREABLE_VIEWS if name in self._values
+        }
+
+    @property
+    def pdf_path(self):
+        return self.sources.get("account")
+
+    @property
+    def docx_path(self):
+        return self.sources.get("profile")
+
+    @property
+    def passport_path(self):
+        return self.sources.get("passport")
+
+    @property
+    def description_path(self):
+        return self.sources.get("description")
+
+    def _parse(self, name: str, parser, source, timeout, cancel_event) -> Any:
+        """
+        Memoized parse of one document.
+
+        With a ``timeout`` or ``cancel_event`` the parser runs in a child
+        process (see utils.IsolatedPool) that is killed when time runs
+        out or the parse is cancelled, so a pathological document cannot
+        hold a worker thread.
+        """
+        if timeout is None and cancel_event is None:
+            return self._memoized(name, lambda: parser(source))
+        if not isinstance(source, (str, os.PathLike)):
+            # Buffers such as mmap slices must be copied to reach the worker
+            source = bytes(source)
+        return self._memoized(
+            name,
+            lambda: utils.call_in_process(
+                parser, source, timeout=timeout, cancel_event=cancel_event
+            ),
+        )
+
+    def pdf_fields(
+        self, cancel_event=None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Form fields of account.pdf."""
+        return self._parse(
+            "pdf", utils.extract_pdf, self.pdf_path, timeout, cancel_event
+        )
+
+    def docx_fields(
+        self, cancel_event=None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Personal details parsed from profile.docx."""
+        return self._parse(
+            "docx", utils.parse_docx, self.docx_path, timeout, cancel_event
+        )
+
+    def passport_image(self):
+        """Decoded grayscale passport image."""
+        return self._memoized(
+            "passport_image", lambda: utils.read_grayscale(self.passport_path)
+        )
+
+    def preprocessed_image(self):
+        """Passport image enhanced for full-page OCR."""
+        return self._memoized(
+            "preprocessed_image", lambda: utils.enhance_image(self.passport_image())
+        )
+
+    def ocr_text(self, cancel_event=None, timeout: Optional[float] = None) -> str:
+        """
+        Full-page OCR text of the passport.
+
+        If ``cancel_event`` is set, Tesseract is skipped or killed and an
+        empty string is returned (and not memoized).
+        """
+
+        def compute() -> str:
+            img = self.preprocessed_image()
+            psm = utils.load_ocr_profile()["psm"]
+            return utils.run_tesseract(
+                img, config=f"--psm {psm}", timeout=timeout, cancel_event=cancel_event
+            )
+
+        try:
+            return self._memoized("ocr_text", compute)
+        except utils.OCRCancelled:
+            return ""
+
+    def mrz(self, cancel_event=None, timeout: Optional[float] = None) -> Optional[MRZ]:
+        """
+        Parsed machine-readable zone of the passport.
+
+        Returns None if cancelled before or while Tesseract runs; raises
+        MRZError if no valid MRZ could be read.
+        """
+
+        def compute() -> MRZ:
+            img = self.passport_image()
+            if img is None:
+                raise MRZError(f"Cannot read image {self.passport_path}")
+            mrz = read_mrz_image(img, cancel_event=cancel_event, timeout=timeout)
+            if mrz is None:
+                raise utils.OCRCancelled()
+            return mrz
+
+        try:
+            return self._memoized("mrz", compute)
+        except utils.OCRCancelled:
+            return None
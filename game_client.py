@@ -1,9 +1,12 @@
 import os
-import time
 import logging
 import requests
 from dotenv import load_dotenv
 
+from rate_control import RateController, RETRYABLE_STATUSES, was_not_processed
+from stream_json import parse_payload
+from utils import DOCUMENT_FILES
+
 load_dotenv()
 
 logging.basicConfig(
@@ -12,11 +15,17 @@ logging.basicConfig(
 
 
 class GameClient:
-    def __init__(self):
+    def __init__(self, rate_controller=None, max_retries=5, document_dir=None):
         self.api_key = os.getenv("API_KEY")
         self.player_name = os.getenv("PLAYER_NAME", "DefaultPlayer")
         self.base_url = "https://hackathon-api.mlo.sehlat.io"
         self.session_data = {}
+        self.rate_controller = rate_controller or RateController()
+        self.max_retries = max_retries
+
+        # When set, responses are streamed and documents are decoded straight
+        # into this directory instead of being kept base64-encoded in memory
+        self.document_dir = document_dir
 
         self.headers = {
             "accept": "application/json",
@@ -24,19 +33,73 @@ class GameClient:
             "X-Api-Key": self.api_key,
         }
 
+    def _post(self, url, payload, idempotent=True):
+        """
+        POST through the rate controller, resending throttled requests.
+
+        Requests that must not be applied twice (idempotent=False) are only
+        resent when the backend certainly did not process them.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_controller.wait()
+            response = requests.post(
+                url, json=payload, headers=self.headers, stream=bool(self.document_dir)
+            )
+            retry_after = response.headers.get("Retry-After")
+            self.rate_controller.record(response.status_code, retry_after)
+
+            if idempotent:
+                retry = response.status_code in RETRYABLE_STATUSES
+            else:
+                retry = was_not_processed(response.status_code, retry_after)
+            if not retry or attempt == self.max_retries:
+                break
+
+            response.close()
+            logging.warning(
+                f"Backend throttled request ({response.status_code}), "
+                f"retry {attempt + 1}/{self.max_retries}"
+            )
+
+        return response
+
+    def _open_document(self, field):
+        """Open the destination file for a streamed document field."""
+        os.makedirs(self.document_dir, exist_ok=True)
+        return open(os.path.join(self.document_dir, DOCUMENT_FILES[field]), "wb")
+
+    def _read_json(self, response):
+        """Decode a response body; returns None if it is empty."""
+        if not self.document_dir:
+            if not response.text.strip():
+                return None
+            return response.json()
+
+        with response:
+            return parse_payload(
+                response.iter_content(chunk_size=64 * 1024),
+                self._open_document,
+                DOCUMENT_FILES,
+            )
+
+    def _log_response_text(self, response):
+        # A streamed body has already been consumed by the parser
+        if not self.document_dir:
+            logging.debug(f"Response text: {response.text}")
+
     def start_game(self):
         url = f"{self.base_url}/game/start"
         payload = {"player_name": self.player_name}
 
         try:
             logging.info("Starting the game...")
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._post(url, payload)
 
-            if not response.text.strip():
+            data = self._read_json(response)
+            if data is None:
                 logging.warning("Empty response body.")
                 return False
 
-            data = response.json()
             required_keys = {
                 "message",
                 "session_id",
@@ -56,7 +119,7 @@ class GameClient:
 
         except ValueError:
             logging.error("Invalid JSON response.")
-            logging.debug(f"Response text: {response.text}")
+            self._log_response_text(response)
         except requests.RequestException as e:
             logging.error(f"Request error: {e}")
 
@@ -76,13 +139,13 @@ class GameClient:
 
         try:
             logging.info(f"Posting decision: {payload['decision']}")
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._post(url, payload, idempotent=False)
 
-            if not response.text.strip():
+            data = self._read_json(response)
+            if data is None:
                 logging.warning("Empty response body.")
                 return False
 
-            data = response.json()
             if data.get("status") == "active":
                 self.session_data.update(
                     {
@@ -99,7 +162,7 @@ class GameClient:
 
         except ValueError:
             logging.error("Invalid JSON response.")
-            logging.debug(f"Response text: {response.text}")
+            self._log_response_text(response)
         except requests.RequestException as e:
             logging.error(f"Request error: {e}")
 
@@ -131,4 +194,6 @@ if __name__ == "__main__":
 
         decision = True
         while gc.post_decision(decision):
-            time.sleep(1.0)
+            pass
+
+        logging.info(f"Pacing: {gc.rate_controller.summary()}")
@@ -5,11 +5,14 @@ Handles the client data processing workflow with GameClient integration.
 
 import os
 import shutil
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
 from game_client import GameClient
 from classifier import Classifier
+from classifier_service import ServiceClient
+from decision_cache import DecisionCache
+from workspace import Workspace
 import utils
 
 
@@ -19,20 +22,43 @@ class GamePlayer:
     and making classification decisions.
     """
 
-    def __init__(self):
-        """Initialize the game player with required components and directories."""
-        self.game_client = GameClient()
-        self.classifier = Classifier()
+    def __init__(self, stream_documents: bool = True, cache_path: Optional[str] = None):
+        """
+        Initialize the game player with required components and directories.
 
-        # Define working directories
-        self.tmp_dir = "tmp_client/"
+        Args:
+            stream_documents: Decode documents straight from the response
+                stream into the temporary directory
+            cache_path: Persist classification decisions to this file so
+                repeat clients are answered without re-parsing
+        """
+        # Define working directories; scratch space is private to this player
+        self.workspace = Workspace(prefix="player-")
+        self.tmp_dir = self.workspace.path("client/")
         self.false_neg_dir = "false_negative_client/"
         self.false_pos_dir = "false_positive_client/"
 
+        self.stream_documents = stream_documents
+        self.game_client = GameClient(
+            document_dir=self.tmp_dir if stream_documents else None
+        )
+
+        # Use the warm classification service when one is configured
+        self.cache_path = cache_path
+        service_socket = os.getenv("CLASSIFIER_SOCKET")
+        if service_socket:
+            self.classifier = ServiceClient(service_socket)
+        else:
+            self.classifier = self._local_classifier()
+
         # Ensure directories exist
         for directory in [self.tmp_dir, self.false_neg_dir, self.false_pos_dir]:
             os.makedirs(directory, exist_ok=True)
 
+        # Background worker for cleanup that must not delay the next request
+        self._housekeeping = ThreadPoolExecutor(max_workers=1)
+        self._retired_dirs = 0
+
     def play(self) -> int:
         """
         Run the game loop, processing clients and submitting decisions.
@@ -46,29 +72,55 @@ class GamePlayer:
         score = 0
 
         while success:
-            # Get and process client data
-            client_data = self.game_client.get_client_data()
-            self.save_data(client_data)
+            # Get and process client data (already on disk when streaming)
+            if not self.stream_documents:
+                self.save_data(self.game_client.get_client_data())
 
             # Make classification decision
-            decision = self.classifier.classify(client_path=self.tmp_dir)
+            decision = self.classify()
+
+            # Clear the way for the next client's documents before posting
+            retired_dir = self._retire_tmp_dir()
             success = self.game_client.post_decision(decision=decision)
 
             if success:
-                # Continue to next client
+                # Continue to next client; pacing is handled by the game client
                 score = self.game_client.get_score()
-                self._cleanup_tmp_dir()
-                time.sleep(0.5)
+                self._housekeeping.submit(
+                    shutil.rmtree, retired_dir, ignore_errors=True
+                )
             else:
                 # Game ended, save the failed client data
                 target_dir = self.false_pos_dir if decision else self.false_neg_dir
-                self._archive_failed_client(target_dir)
+                self._archive_failed_client(target_dir, retired_dir)
                 print(
                     f"Game ended. Decision was {'correct' if not decision else 'incorrect'}"
                 )
 
+        self._housekeeping.shutdown(wait=True)
+        print(f"Session pacing: {self.game_client.rate_controller.summary()}")
         return score
 
+    def _local_classifier(self) -> Classifier:
+        return Classifier(cache=DecisionCache(path=self.cache_path))
+
+    def classify(self) -> bool:
+        """
+        Classify the current client.
+
+        If the classification service stays busy or is unreachable after
+        its retries, the player switches to an in-process classifier rather
+        than ending the game.
+        """
+        try:
+            return self.classifier.classify(client_path=self.tmp_dir)
+        except (RuntimeError, OSError) as e:
+            if not isinstance(self.classifier, ServiceClient):
+                raise
+            print(f"Classifier service unavailable ({e}), classifying locally")
+            self.classifier = self._local_classifier()
+            return self.classifier.classify(client_path=self.tmp_dir)
+
     def save_data(self, client_data: Dict[str, Any]) -> None:
         """
         Save client data files to the temporary directory.
@@ -84,20 +136,39 @@ class GamePlayer:
         except Exception as e:
             print(f"Error saving client data: {e}")
 
-    def _cleanup_tmp_dir(self) -> None:
-        """Remove temporary directory contents."""
+    def _retire_tmp_dir(self) -> str:
+        """
+        Move the current client's files out of the temporary directory.
+
+        The directory is renamed out of the way (cheap) and an empty one is
+        recreated, so the next client can be written while the old files are
+        deleted on the housekeeping thread or archived.
+        Returns the path the old files were moved to.
+        """
+        self._retired_dirs += 1
+        retired = f"{self.tmp_dir.rstrip('/')}.old-{self._retired_dirs}"
         if os.path.exists(self.tmp_dir):
-            shutil.rmtree(self.tmp_dir)
-            os.makedirs(self.tmp_dir, exist_ok=True)
+            os.rename(self.tmp_dir, retired)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return retired
+
+    def close(self) -> None:
+        """Remove this player's workspace."""
+        self._housekeeping.shutdown(wait=True)
+        self.workspace.cleanup()
 
-    def _archive_failed_client(self, target_dir: str) -> None:
+    def _archive_failed_client(self, target_dir: str, source_dir: str) -> None:
         """
         Move failed client data to appropriate directory for later analysis.
 
         Args:
             target_dir: Directory to store the failed client data
+            source_dir: Directory currently holding the client's files
         """
         try:
+            if not os.path.exists(source_dir):
+                return
+
             # Find next available client number
             existing_clients = [
                 name
@@ -116,21 +187,27 @@ class GamePlayer:
             else:
                 next_num = 1
 
-            # Move client data to archive directory
-            new_client_dir = f"client_{next_num}"
-            dest_path = os.path.join(target_dir, new_client_dir)
-
-            if os.path.exists(self.tmp_dir):
-                shutil.move(self.tmp_dir, dest_path)
-                print(f"Archived failed client to {dest_path}")
-
-                # Recreate empty tmp directory
-                os.makedirs(self.tmp_dir, exist_ok=True)
+            # Claim the directory atomically; other players may archive too
+            while True:
+                dest_path = os.path.join(target_dir, f"client_{next_num}")
+                try:
+                    os.mkdir(dest_path)
+                    break
+                except FileExistsError:
+                    next_num += 1
+
+            # Move client data to archive directory (may cross filesystems)
+            shutil.copytree(source_dir, dest_path, dirs_exist_ok=True)
+            shutil.rmtree(source_dir, ignore_errors=True)
+            print(f"Archived failed client to {dest_path}")
         except Exception as e:
             print(f"Error archiving failed client: {e}")
 
 
 if __name__ == "__main__":
     game_player = GamePlayer()
-    final_score = game_player.play()
+    try:
+        final_score = game_player.play()
+    finally:
+        game_player.close()
     print(f"Game completed with score: {final_score}")
@@ -0,0 +1,251 @@
+"""
+Machine-readable zone (MRZ) reading for TD3 passports.
+Locates the two MRZ lines at the bottom of the passport image, OCRs only
+those lines with the MRZ character set and validates the ICAO 9303 check
+digits, so fields can be compared exactly instead of fuzzy-searched.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import cv2
+
+import utils
+
+MRZ_CHARSET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<"
+MRZ_LINE_LENGTH = 44
+MRZ_OCR_CONFIG = f"--psm 6 -c tessedit_char_whitelist={MRZ_CHARSET}"
+
+# Fraction of the image height (from the bottom) searched for the MRZ
+MRZ_SEARCH_REGION = 0.35
+
+# OCR confusions in fields that can only hold digits
+DIGIT_FIXES = str.maketrans(
+    {
+        "O": "0",
+        "Q": "0",
+        "D": "0",
+        "I": "1",
+        "L": "1",
+        "Z": "2",
+        "S": "5",
+        "G": "6",
+        "B": "8",
+    }
+)
+
+# ICAO 9303 transliterations that differ from simply dropping the diacritic
+ICAO_TRANSLITERATIONS = {
+    "Ä": "AE",
+    "Ö": "OE",
+    "Ü": "UE",
+    "ß": "SS",
+    "Å": "AA",
+    "Æ": "AE",
+    "Ø": "OE",
+}
+
+# Nationalities as written in the profile document, mapped to MRZ codes
+NATIONALITY_CODES = {
+    "austrian": "AUT",
+    "belgian": "BEL",
+    "british": "GBR",
+    "bulgarian": "BGR",
+    "croatian": "HRV",
+    "czech": "CZE",
+    "danish": "DNK",
+    "dutch": "NLD",
+    "estonian": "EST",
+    "finnish": "FIN",
+    "french": "FRA",
+    "german": "D<<",
+    "greek": "GRC",
+    "hungarian": "HUN",
+    "irish": "IRL",
+    "italian": "ITA",
+    "latvian": "LVA",
+    "lithuanian": "LTU",
+    "luxembourgish": "LUX",
+    "norwegian": "NOR",
+    "polish": "POL",
+    "portuguese": "PRT",
+    "romanian": "ROU",
+    "slovak": "SVK",
+    "slovenian": "SVN",
+    "spanish": "ESP",
+    "swedish": "SWE",
+    "swiss": "CHE",
+}
+
+
+class MRZError(ValueError):
+    """Raised when the MRZ cannot be located, read or validated."""
+
+
+@dataclass
+class MRZ:
+    document_type: str
+    issuing_country: str
+    surname: str
+    given_names: str
+    document_number: str
+    nationality: str
+    birth_date: str
+    sex: str
+    expiry_date: str
+    personal_number: str
+
+    @staticmethod
+    def from_lines(line1: str, line2: str) -> "MRZ":
+        """
+        Parse and validate the two lines of a TD3 MRZ.
+
+        Raises MRZError if the layout or any check digit is wrong.
+        """
+        if len(line1) != MRZ_LINE_LENGTH or len(line2) != MRZ_LINE_LENGTH:
+            raise MRZError("MRZ lines must be 44 characters long")
+
+        # Numeric positions of line 2 (dates and check digits)
+        line2 = list(line2)
+        for i in [9, 13, 14, 15, 16, 17, 18, 19, 21, 22, 23, 24, 25, 26, 27, 43]:
+            line2[i] = line2[i].translate(DIGIT_FIXES)
+        line2 = "".join(line2)
+
+        fields = [
+            ("document number", line2[0:9], line2[9]),
+            ("birth date", line2[13:19], line2[19]),
+            ("expiry date", line2[21:27], line2[27]),
+            ("personal number", line2[28:42], line2[42]),
+        ]
+        for name, value, digit in fields:
+            if check_digit(value) != digit and not (
+                name == "personal number" and digit == "<"
+            ):
+                raise MRZError(f"Check digit mismatch for {name}")
+
+        composite = line2[0:10] + line2[13:20] + line2[21:43]
+        if check_digit(composite) != line2[43]:
+            raise MRZError("Composite check digit mismatch")
+
+        surname, _, given_names = line1[5:].partition("<<")
+
+        return MRZ(
+            document_type=line1[0:2].rstrip("<"),
+            issuing_country=line1[2:5],
+            surname=surname.strip("<"),
+            given_names=given_names.strip("<"),
+            document_number=line2[0:9].rstrip("<"),
+            nationality=line2[10:13],
+            birth_date=line2[13:19],
+            sex=line2[20],
+            expiry_date=line2[21:27],
+            personal_number=line2[28:42].rstrip("<"),
+        )
+
+
+def check_digit(value: str) -> str:
+    """Compute the ICAO 9303 check digit (weights 7, 3, 1) of a field."""
+    total = 0
+    for i, char in enumerate(value):
+        if char.isdigit():
+            number = int(char)
+        elif char.isalpha():
+            number = ord(char) - ord("A") + 10
+        else:
+            number = 0
+        total += number * (7, 3, 1)[i % 3]
+    return str(total % 10)
+
+
+def to_mrz_name(text: str, icao: bool = False) -> str:
+    """
+    Transliterate a name into MRZ form (upper case, '<' as separator).
+
+    Args:
+        text: Name as written in the documents
+        icao: Use ICAO digraphs (Ä -> AE) instead of dropping diacritics
+    """
+    text = text.upper()
+    if icao:
+        for char, replacement in ICAO_TRANSLITERATIONS.items():
+            text = text.replace(char, replacement)
+    text = utils.normalize_text(text).upper()
+    # ICAO 9303 omits apostrophes (O'BRIEN -> OBRIEN) rather than separating
+    text = re.sub(r"['\u2019\u02bc`]", "", text)
+    return re.sub(r"[^A-Z]+", "<", text).strip("<")
+
+
+def locate_mrz(img):
+    """
+    Crop the MRZ band out of a grayscale passport image.
+
+    The bottom of the page is searched for wide, short text blobs; the MRZ
+    is the band covering them. Falls back to the whole search region.
+    """
+    height, width = img.shape[:2]
+    top = int(height * (1 - MRZ_SEARCH_REGION))
+    region = img[top:, :]
+
+    # Dark text on light background: blackhat, then smear characters into lines
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    blackhat = cv2.morphologyEx(region, cv2.MORPH_BLACKHAT, kernel)
+    _, binary = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 15 or 1, 3))
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, line_kernel)
+
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = [cv2.boundingRect(c) for c in contours]
+    boxes = [(x, y, w, h) for x, y, w, h in boxes if w > width * 0.6 and w > 5 * h]
+
+    if not boxes:
+        return region
+
+    y_min = min(y for _, y, _, _ in boxes)
+    y_max = max(y + h for _, y, _, h in boxes)
+    pad = max(4, (y_max - y_min) // 6)
+    return region[max(0, y_min - pad) : y_max + pad, :]
+
+
+def _mrz_candidate_lines(text: str) -> List[str]:
+    """Pick MRZ-looking lines out of raw OCR output."""
+    lines = [re.sub(r"[^A-Z0-9<]", "", line.upper()) for line in text.splitlines()]
+    lines = [line for line in lines if len(line) >= 30 and "<" in line]
+    return [line[:MRZ_LINE_LENGTH].ljust(MRZ_LINE_LENGTH, "<") for line in lines]
+
+
+def read_mrz(
+    image_path: str, cancel_event=None, timeout: Optional[float] = None
+) -> Optional[MRZ]:
+    """
+    Locate, OCR and parse the MRZ of a passport image.
+
+    Returns None if ``cancel_event`` is set before or while Tesseract runs.
+    Raises MRZError if no valid MRZ could be read and TimeoutError if OCR
+    runs longer than ``timeout`` seconds.
+    """
+    img = utils.read_grayscale(image_path)
+    if img is None:
+        raise MRZError(f"Cannot read image {image_path}")
+    return read_mrz_image(img, cancel_event=cancel_event, timeout=timeout)
+
+
+def read_mrz_image(
+    img, cancel_event=None, timeout: Optional[float] = None
+) -> Optional[MRZ]:
+    """Same as read_mrz, for an already decoded grayscale image."""
+    band = locate_mrz(img)
+    band = cv2.resize(band, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    _, band = cv2.threshold(band, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    try:
+        text = utils.run_tesseract(
+            band, config=MRZ_OCR_CONFIG, timeout=timeout, cancel_event=cancel_event
+        )
+    except utils.OCRCancelled:
+        return None
+    lines = _mrz_candidate_lines(text)
+    if len(lines) < 2:
+        raise MRZError("MRZ lines not found")
+
+    return MRZ.from_lines(lines[-2], lines[-1])
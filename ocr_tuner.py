@@ -0,0 +1,190 @@
+"""
+OCR preprocessing auto-tuner.
+Sweeps the passport preprocessing and Tesseract parameters in parallel over
+the local corpus, measures accuracy and per-image latency for every
+combination, prints the Pareto front and writes the chosen profile where
+utils.extract_text loads it.
+
+Usage:
+    python3 ocr_tuner.py --clients 200 --workers 8 --latency-budget 0.5
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+import utils
+from classifier import Person
+
+# Parameter grid; block sizes must be odd
+PARAM_GRID = {
+    "scale": [1, 1.5, 2, 3],
+    "interpolation": ["linear", "cubic", "area"],
+    "block_size": [9, 15, 31],
+    "c": [5, 10, 15, 20],
+    "psm": [6, 11],
+}
+
+
+def collect_ground_truth(num_clients: int, sample: int) -> List[Tuple[str, Dict, bool]]:
+    """
+    Reference data for clients whose PDF and DOCX agree.
+
+    For these clients the passport check alone decides, so the expected
+    label is the right answer for it: consistent clients must be accepted
+    and inconsistent ones (forged passports) rejected. Both kinds are
+    sampled equally, so a profile that lets forgeries through is penalized.
+
+    Args:
+        num_clients: Size of the client corpus
+        sample: Maximum number of clients to use
+    Returns (passport path, person data, expected decision) per client.
+    """
+    per_label = {True: [], False: []}
+    for i in range(num_clients):
+        path = f"client_data/client_{i + 1}/"
+        expected = (i % 1000) < 500
+        if len(per_label[expected]) >= (sample + 1) // 2 or not os.path.isdir(path):
+            continue
+
+        person = Person(path)
+        if person.load_pdf() and person.load_docx():
+            per_label[expected].append((person.passport_path, person.data, expected))
+        if sum(len(clients) for clients in per_label.values()) >= sample:
+            break
+    return per_label[True] + per_label[False]
+
+
+def _evaluate(
+    params: Dict[str, Any], passport_path: str, data: Dict, expected: bool
+) -> Tuple:
+    """
+    OCR one passport with one parameter set.
+    Returns (decision, expected, seconds).
+    """
+    start = time.perf_counter()
+    try:
+        text = utils.extract_text(passport_path, profile=params)
+    except Exception:
+        return False, expected, time.perf_counter() - start
+    seconds = time.perf_counter() - start
+
+    person = Person(os.path.dirname(passport_path))
+    person.data = data
+    return person.check_passport(text), expected, seconds
+
+
+def sweep(
+    clients: List[Tuple[str, Dict, bool]], grid: Dict[str, List], workers: int
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every parameter combination on every client in parallel.
+    Returns one result per combination with accept/reject accuracy, the
+    false accept rate on forgeries and latency stats.
+    """
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    outcomes: Dict[int, List[Tuple[bool, bool, float]]] = {
+        i: [] for i in range(len(combos))
+    }
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_evaluate, params, path, data, expected): index
+            for index, params in enumerate(combos)
+            for path, data, expected in clients
+        }
+        for future in tqdm(futures, desc="Tuning", unit="image"):
+            outcomes[futures[future]].append(future.result())
+
+    results = []
+    for index, params in enumerate(combos):
+        correct = [decision == expected for decision, expected, _ in outcomes[index]]
+        forgeries = [
+            decision for decision, expected, _ in outcomes[index] if not expected
+        ]
+        latencies = sorted(seconds for _, _, seconds in outcomes[index])
+        results.append(
+            {
+                "params": params,
+                "accuracy": sum(correct) / len(correct) if correct else 0.0,
+                "false_accept_rate": (
+                    sum(forgeries) / len(forgeries) if forgeries else 0.0
+                ),
+                "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p95_latency": (
+                    latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+                ),
+            }
+        )
+    return results
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Combinations not beaten on both accuracy and mean latency."""
+    front = []
+    best_accuracy = -1.0
+    for result in sorted(results, key=lambda r: (r["mean_latency"], -r["accuracy"])):
+        if result["accuracy"] > best_accuracy:
+            front.append(result)
+            best_accuracy = result["accuracy"]
+    return front
+
+
+def choose(
+    front: List[Dict[str, Any]], latency_budget: Optional[float]
+) -> Dict[str, Any]:
+    """Most accurate point on the front that fits the latency budget."""
+    candidates = [
+        r
+        for r in front
+        if latency_budget is None or r["mean_latency"] <= latency_budget
+    ]
+    if not candidates:
+        print("No combination fits the latency budget; using the fastest one")
+        return front[0]
+    return max(candidates, key=lambda r: (r["accuracy"], -r["mean_latency"]))
+
+
+def print_front(front: List[Dict[str, Any]]) -> None:
+    print("\n=== Pareto Front ===")
+    for result in front:
+        params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(
+            f"{result['accuracy'] * 100:6.2f}% | "
+            f"FA {result['false_accept_rate'] * 100:5.2f}% | "
+            f"mean {result['mean_latency']:.3f}s | "
+            f"p95 {result['p95_latency']:.3f}s | {params}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune OCR preprocessing.")
+    parser.add_argument("--num-clients", type=int, default=3000)
+    parser.add_argument("--clients", type=int, default=100, help="sample size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--latency-budget", type=float, help="max mean seconds per image"
+    )
+    parser.add_argument("--output", default=utils.OCR_PROFILE_PATH)
+    args = parser.parse_args()
+
+    # One Tesseract thread per worker, so workers don't skew each other's latency
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    clients = collect_ground_truth(args.num_clients, args.clients)
+    print(f"Tuning on {len(clients)} clients")
+
+    results = sweep(clients, PARAM_GRID, args.workers)
+    front = pareto_front(results)
+    print_front(front)
+
+    chosen = choose(front, args.latency_budget)
+    with open(args.output, "w") as f:
+        json.dump({**chosen, "pareto_front": front}, f, indent=2)
+    print(f"\nWrote profile to {args.output}: {chosen['params']}")
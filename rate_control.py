@@ -0,0 +1,148 @@
+"""
+Adaptive request pacing for the game backend.
+Sends as fast as the backend allows and backs off when it pushes back.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+# Status codes that signal the backend wants us to slow down
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Subset worth resending for requests that are safe to repeat; a 502/504
+# may come back after the backend already acted on the request
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+def was_not_processed(status_code: int, retry_after: Optional[str] = None) -> bool:
+    """
+    True if the backend refused a request without acting on it.
+
+    Only these responses may be resent for requests that must not be
+    applied twice, such as a decision: 429, and 503 with a Retry-After.
+
+    Args:
+        status_code: HTTP status of the response
+        retry_after: Raw Retry-After header value, if any
+    """
+    return status_code == 429 or (status_code == 503 and bool(retry_after))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into a delay in seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateController:
+    """
+    Multiplicative backoff / multiplicative recovery pacing controller.
+
+    The controller starts with no delay between requests. Every throttled
+    response doubles the gap (starting from ``backoff_base``) up to
+    ``max_interval``; every successful response multiplies it by
+    ``recovery_factor`` (halving it by default) until it falls back to
+    ``min_interval``. A Retry-After header always takes precedence over the
+    computed gap.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.0,
+        max_interval: float = 30.0,
+        backoff_base: float = 0.25,
+        recovery_factor: float = 0.5,
+    ):
+        """Initialize pacing bounds and session counters."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_base = backoff_base
+        self.recovery_factor = recovery_factor
+
+        self.interval = min_interval
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+        self.started_at: Optional[float] = None
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def wait(self) -> None:
+        """Block until the next request is allowed to go out."""
+        with self._lock:
+            now = time.monotonic()
+            if self.started_at is None:
+                self.started_at = now
+            delay = max(0.0, self._next_allowed - now)
+
+        if delay > 0:
+            time.sleep(delay)
+            self.waited += delay
+
+    def record(self, status_code: int, retry_after: Optional[str] = None) -> None:
+        """
+        Update pacing from a backend response.
+
+        Args:
+            status_code: HTTP status of the response
+            retry_after: Raw Retry-After header value, if any
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+
+            if status_code in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.interval = min(
+                    self.max_interval, max(self.interval * 2, self.backoff_base)
+                )
+            else:
+                self.interval *= self.recovery_factor
+                if self.interval < max(self.min_interval, 1e-3):
+                    self.interval = self.min_interval
+
+            delay = self.interval
+            hinted = parse_retry_after(retry_after)
+            if hinted is not None:
+                delay = max(delay, hinted)
+
+            self._next_allowed = now + delay
+
+    def elapsed(self) -> float:
+        """Seconds since the first request of the session."""
+        if self.started_at is None:
+            return 0.0
+        return time.monotonic() - self.started_at
+
+    def achieved_rate(self) -> float:
+        """Requests per second achieved so far in this session."""
+        elapsed = self.elapsed()
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Human-readable pacing report for the session."""
+        return (
+            f"{self.requests} requests in {self.elapsed():.2f}s "
+            f"({self.achieved_rate():.2f} req/s), "
+            f"{self.throttled} throttled, {self.waited:.2f}s spent waiting"
+        )
@@ -0,0 +1,255 @@
+"""
+Per-client validation results.
+run_validation appends one compact JSON record per client to a log file as
+it goes (decision, expected label, failing check, mismatched fields with
+their conflicting values per document, stage timings), so failures and slow
+clients can be analysed by scanning the log instead of re-running OCR over
+the corpus. Every record carries the ID of the run that wrote it.
+
+Usage:
+    python3 classifier.py --log results/run.jsonl
+    python3 result_log.py results/run.jsonl --slowest 20 --stage passport
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sharding import print_summary, summarize
+
+OUTCOMES = ("true_accept", "true_reject", "false_accept", "false_reject")
+
+
+def new_run_id() -> str:
+    """Sortable, unique ID for one validation run."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def jsonable(value: Any) -> Any:
+    """Convert record values such as Address dataclasses to plain JSON types."""
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, dict):
+        return {key: jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    return value
+
+
+class ResultLog:
+    """
+    Append-only JSONL writer, one record per line.
+
+    Every record is flushed as soon as it is written, so an interrupted run
+    keeps everything classified so far. Reopening a log cuts off a last
+    line the interrupted run left unfinished, so new records start on a
+    line of their own. Can be used as a context manager.
+    """
+
+    def __init__(self, path: str, run_id: Optional[str] = None):
+        """
+        Open the log for appending.
+
+        Args:
+            path: Log file; created with its directory if missing
+            run_id: Stamped on every record as "run", if given
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.run_id = run_id
+        if os.path.exists(path):
+            _drop_partial_line(path)
+        self._file = open(path, "a")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.run_id is not None:
+            record = {"run": self.run_id, **record}
+        line = json.dumps(jsonable(record), separators=(",", ":"), default=str)
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResultLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _drop_partial_line(path: str) -> None:
+    """Truncate a file after its last newline, scanning back from the end."""
+    with open(path, "rb+") as f:
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(1 << 16, pos)
+            f.seek(pos - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                pos += newline + 1 - step
+                break
+            pos -= step
+        if pos < end:
+            print(f"Dropping unfinished last record of {path}")
+            f.truncate(pos)
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Every record of one or more logs, in file order.
+
+    A truncated last line (from a run killed mid-write) is skipped.
+    """
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed record in {path}")
+
+
+def read_results(
+    paths: Iterable[str], run: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    One record per client from one or more logs.
+
+    Re-running with the same log appends a second record per client; only
+    the newest one is kept, so summaries never count a client twice.
+
+    Args:
+        paths: Logs written by run_validation
+        run: Only use records of this run ID
+    """
+    latest: Dict[int, Dict[str, Any]] = {}
+    for record in read_records(paths):
+        if run is None or record.get("run") == run:
+            latest[record["client"]] = record
+    return [latest[client] for client in sorted(latest)]
+
+
+def outcome(record: Dict[str, Any]) -> str:
+    """Confusion-matrix cell of a record, e.g. "false_reject"."""
+    correct = "true" if record["result"] == record["expected"] else "false"
+    return f"{correct}_{'accept' if record['result'] else 'reject'}"
+
+
+def confusion(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Confusion breakdown of a run.
+
+    Returns the count per outcome, the count per (failing check, outcome)
+    and, for wrong rejections, how often each field mismatched.
+    """
+    outcomes: Counter = Counter()
+    by_stage: Dict[str, Counter] = defaultdict(Counter)
+    false_reject_fields: Counter = Counter()
+
+    for record in records:
+        cell = outcome(record)
+        outcomes[cell] += 1
+        stage = record.get("deadline_hit") and "deadline"
+        by_stage[stage or record.get("failed_stage") or "passed"][cell] += 1
+        if cell == "false_reject":
+            false_reject_fields.update(record.get("mismatches") or [])
+
+    return {
+        "outcomes": dict(outcomes),
+        "by_stage": {stage: dict(cells) for stage, cells in by_stage.items()},
+        "false_reject_fields": dict(false_reject_fields.most_common()),
+    }
+
+
+def slowest(
+    records: Iterable[Dict[str, Any]], count: int = 10, stage: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    The slowest clients of a run.
+
+    Args:
+        records: Logged records
+        count: Number of clients to return
+        stage: Rank by this stage's timing instead of the total time
+    """
+
+    def seconds(record: Dict[str, Any]) -> float:
+        if stage:
+            return (record.get("timings") or {}).get(stage, 0.0)
+        return record.get("seconds", 0.0)
+
+    return sorted(records, key=seconds, reverse=True)[:count]
+
+
+def print_confusion(breakdown: Dict[str, Any]) -> None:
+    print("=== Outcomes by Failing Check ===")
+    print(f"{'check':<10}" + "".join(f"{cell:>14}" for cell in OUTCOMES))
+    for stage, cells in sorted(breakdown["by_stage"].items()):
+        print(f"{stage:<10}" + "".join(f"{cells.get(c, 0):>14}" for c in OUTCOMES))
+
+    if breakdown["false_reject_fields"]:
+        print("\n=== Fields Mismatched in False Rejects ===")
+        for name, count in breakdown["false_reject_fields"].items():
+            print(f"{name:<20}{count:>6}")
+
+
+def print_slowest(records: List[Dict[str, Any]], stage: Optional[str]) -> None:
+    print(f"\n=== Slowest Clients{f' ({stage} stage)' if stage else ''} ===")
+    for record in records:
+        timings = ", ".join(
+            f"{name} {value:.2f}s"
+            for name, value in (record.get("timings") or {}).items()
+        )
+        print(
+            f"client_{record['client'] + 1:<8} {record.get('seconds', 0.0):7.2f}s "
+            f"{outcome(record):<13} {timings}"
+        )
+
+
+def print_conflicts(records: List[Dict[str, Any]], count: int) -> None:
+    """Conflicting values, by document, of the first ``count`` rejections."""
+    rejected = [r for r in records if r.get("conflicts")][:count]
+    if not rejected:
+        return
+    print("\n=== Conflicting Values ===")
+    for record in rejected:
+        print(f"client_{record['client'] + 1} ({outcome(record)})")
+        for name, values in record["conflicts"].items():
+            found = " | ".join(
+                f"{source}: {value!r}" for source, value in values.items()
+            )
+            print(f"  {name:<12} {found}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query validation result logs.")
+    parser.add_argument("logs", nargs="+", help="logs written with --log")
+    parser.add_argument("--slowest", type=int, default=10, metavar="N")
+    parser.add_argument("--stage", help="rank slowest clients by this stage")
+    parser.add_argument(
+        "--outcome", choices=OUTCOMES, help="only consider clients with this outcome"
+    )
+    parser.add_argument("--run", help="only consider records of this run ID")
+    parser.add_argument(
+        "--conflicts", type=int, default=0, metavar="N", help="show N clients' values"
+    )
+    args = parser.parse_args()
+
+    records = read_results(args.logs, args.run)
+    runs = sorted({r["run"] for r in records if "run" in r})
+    print(f"Runs: {', '.join(runs) or 'unlabelled'}")
+    if args.outcome:
+        records = [r for r in records if outcome(r) == args.outcome]
+
+    print_summary(summarize(records))
+    print_confusion(confusion(records))
+    print_slowest(slowest(records, args.slowest, args.stage), args.stage)
+    print_conflicts(records, args.conflicts)
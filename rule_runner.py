@@ -0,0 +1,336 @@
+"""
+Two-phase rule evaluation.
+Phase one extracts the raw PDF and DOCX fields, passport OCR text and MRZ of
+every client once and appends them to an extraction file. Phase two replays
+the Person checks of one or more rule sets over that file, without touching
+the documents, and reports each rule set's accuracy against the current
+rules.
+
+A rule set is a Person subclass, given as ``module:ClassName``, that
+overrides the checks, ``address_type`` or ``normalize_phone``.
+
+Usage:
+    python3 rule_runner.py extract --workers 8 --output extracted.jsonl
+    python3 rule_runner.py evaluate extracted.jsonl --rules experiments:LoosePhone
+"""
+
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from tqdm import tqdm
+
+import utils
+from classifier import ClassificationResult, Person
+from corpus_pack import PackedCorpus
+from document_bundle import DocumentBundle
+from mrz import MRZ
+from result_log import ResultLog, outcome, read_records
+from sharding import print_summary, summarize
+
+EXTRACT_FORMAT_VERSION = 1
+BASELINE_RULES = "classifier:Person"
+
+
+@lru_cache(maxsize=None)
+def _open_corpus(path: str) -> PackedCorpus:
+    """One mapping of the packed corpus per worker process."""
+    return PackedCorpus(path)
+
+
+def extract_client(
+    client: int, use_mrz: bool = False, corpus_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Extract every view the rules read from one client's documents.
+
+    A view that fails to extract is stored as None, with the error message
+    under "errors", so the replay rejects the client at that stage just as
+    the classifier would.
+
+    Args:
+        client: 0-based client index
+        use_mrz: Also read the passport MRZ
+        corpus_path: Packed corpus read instead of the client_data/ folders
+    """
+    start = time.perf_counter()
+    path = f"client_data/client_{client + 1}/"
+    documents = None
+    if corpus_path:
+        documents = _open_corpus(corpus_path).documents(client + 1)
+    bundle = DocumentBundle(path, documents)
+
+    views = {
+        "pdf": bundle.pdf_fields,
+        "docx": bundle.docx_fields,
+        "ocr_text": bundle.ocr_text,
+    }
+    if use_mrz:
+        views["mrz"] = lambda: asdict(bundle.mrz())
+
+    record: Dict[str, Any] = {
+        "client": client,
+        "expected": (client % 1000) < 500,
+        "errors": {},
+    }
+    for name, extract in views.items():
+        try:
+            record[name] = extract()
+        except Exception as e:
+            record[name] = None
+            record["errors"][name] = f"{type(e).__name__}: {e}"
+
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def extract(
+    output_path: str,
+    num_clients: int = 3000,
+    workers: Optional[int] = None,
+    use_mrz: bool = False,
+    corpus_path: Optional[str] = None,
+) -> int:
+    """
+    Phase one: extract all clients into an append-only JSONL file.
+
+    The first line describes the extraction; every further line holds one
+    client. Clients already in an existing file are skipped, so an
+    interrupted extraction resumes where it stopped.
+
+    Args:
+        output_path: Extraction file to create or resume
+        num_clients: Size of the client corpus
+        workers: Number of extraction processes
+        use_mrz: Also read the passport MRZ
+        corpus_path: Packed corpus read instead of the client_data/ folders
+    Returns the number of clients extracted by this call.
+    """
+    header = {
+        "format": EXTRACT_FORMAT_VERSION,
+        "mrz": use_mrz,
+        "ocr_profile": utils.load_ocr_profile(),
+    }
+
+    # An empty file is left by a run killed before it wrote the header
+    resuming = os.path.exists(output_path) and os.path.getsize(output_path) > 0
+    done = set()
+    if resuming:
+        existing_header, records = load_extraction(output_path)
+        if existing_header != header:
+            raise ValueError(
+                f"{output_path} was extracted with different settings; "
+                "use a new file"
+            )
+        done = {record["client"] for record in records}
+
+    if corpus_path:
+        corpus = PackedCorpus(corpus_path)
+        available = [client - 1 for client in corpus.clients()]
+        corpus.close()
+    else:
+        available = [
+            i
+            for i in range(num_clients)
+            if os.path.isdir(f"client_data/client_{i + 1}/")
+        ]
+    pending = [i for i in available if i < num_clients and i not in done]
+
+    with ResultLog(output_path) as log, ProcessPoolExecutor(workers) as pool:
+        if not resuming:
+            log.write(header)
+        futures = [
+            pool.submit(extract_client, client, use_mrz, corpus_path)
+            for client in pending
+        ]
+        for future in tqdm(futures, desc="Extracting", unit="client"):
+            log.write(future.result())
+
+    return len(pending)
+
+
+def load_extraction(path: str):
+    """
+    Read an extraction file.
+    Returns (header, client records).
+    """
+    records = list(read_records([path]))
+    if not records or records[0].get("format") != EXTRACT_FORMAT_VERSION:
+        raise ValueError(f"{path} is not an extraction file")
+    return records[0], records[1:]
+
+
+def load_rules(spec: str) -> Type[Person]:
+    """
+    Import a rule set given as ``module:ClassName``.
+
+    Args:
+        spec: Module and name of a Person subclass, e.g. "classifier:Person"
+    """
+    module_name, _, class_name = spec.partition(":")
+    rules = getattr(importlib.import_module(module_name), class_name or "Person")
+    if not (isinstance(rules, type) and issubclass(rules, Person)):
+        raise ValueError(f"{spec} is not a Person subclass")
+    return rules
+
+
+def replay(
+    rules: Type[Person], record: Dict[str, Any], use_mrz: bool = False
+) -> ClassificationResult:
+    """
+    Decide one extracted client with a rule set.
+
+    Mirrors Classifier's sequential pipeline: stages run in order and the
+    first failing one rejects the client. Without an MRZ the passport is
+    checked against the full OCR text, as check_passport_mrz does.
+    """
+    person = rules(f"client_data/client_{record['client'] + 1}/")
+
+    def passport_check() -> bool:
+        if use_mrz and record.get("mrz") is not None:
+            text = record.get("ocr_text") or ""
+            return person.check_mrz(MRZ(**record["mrz"]), text)
+        if record.get("ocr_text") is None:
+            return False
+        return person.check_passport(record["ocr_text"])
+
+    stages = [
+        ("pdf", lambda: record["pdf"] is not None and person.load_pdf(record["pdf"])),
+        (
+            "docx",
+            lambda: record["docx"] is not None and person.load_docx(record["docx"]),
+        ),
+        ("passport", passport_check),
+    ]
+
+    result = ClassificationResult(decision=False)
+    for stage, check in stages:
+        if not check():
+            result.failed_stage = stage
+            result.mismatches = person.mismatches
+            result.conflicts = person.conflicts
+            result.error = person.error
+            return result
+
+    result.decision = True
+    return result
+
+
+def evaluate(
+    path: str,
+    rule_specs: List[str],
+    baseline: str = BASELINE_RULES,
+    use_mrz: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Phase two: replay several rule sets over an extraction in one pass.
+
+    Args:
+        path: Extraction file written by extract()
+        rule_specs: Rule sets to compare against the baseline
+        baseline: Rule set the deltas are computed against
+        use_mrz: Check passports through the extracted MRZ
+    Returns, per rule set, its summary and the clients whose outcome differs
+    from the baseline.
+    """
+    header, records = load_extraction(path)
+    if use_mrz and not header["mrz"]:
+        raise ValueError(f"{path} was extracted without --mrz")
+
+    specs = [baseline] + [spec for spec in rule_specs if spec != baseline]
+    rule_sets = {spec: load_rules(spec) for spec in specs}
+    decided: Dict[str, List[Dict[str, Any]]] = {spec: [] for spec in specs}
+
+    for record in tqdm(records, desc="Evaluating", unit="client"):
+        for spec, rules in rule_sets.items():
+            result = replay(rules, record, use_mrz)
+            decided[spec].append(
+                {
+                    "client": record["client"],
+                    "result": result.decision,
+                    "expected": record["expected"],
+                    "failed_stage": result.failed_stage,
+                    "mismatches": result.mismatches,
+                }
+            )
+
+    report = {}
+    for spec in specs:
+        fixed, broken = [], []
+        for before, after in zip(decided[baseline], decided[spec]):
+            was_right = before["result"] == before["expected"]
+            is_right = after["result"] == after["expected"]
+            if is_right and not was_right:
+                fixed.append(after)
+            elif was_right and not is_right:
+                broken.append(after)
+        report[spec] = {
+            "summary": summarize(decided[spec]),
+            "fixed": fixed,
+            "broken": broken,
+        }
+    return report
+
+
+def print_report(
+    report: Dict[str, Dict[str, Any]], baseline: str, show_changes: int = 10
+) -> None:
+    base = report[baseline]["summary"]
+    for spec, entry in report.items():
+        summary = entry["summary"]
+        print(f"\n##### {spec}{' (baseline)' if spec == baseline else ''}")
+        print_summary(summary)
+        if spec == baseline:
+            continue
+
+        print(
+            f"Accuracy delta    : {summary['accuracy'] - base['accuracy']:+.2f} pp | "
+            f"FN {summary['false_negatives'] - base['false_negatives']:+d} | "
+            f"FP {summary['false_positives'] - base['false_positives']:+d}"
+        )
+        print(f"Fixed / Broken    : {len(entry['fixed'])} / {len(entry['broken'])}")
+        for label in ("fixed", "broken"):
+            for record in entry[label][:show_changes]:
+                reason = record["failed_stage"] or "accepted"
+                if record["mismatches"]:
+                    reason += f" ({', '.join(record['mismatches'])})"
+                print(
+                    f"  {label:<7} client_{record['client'] + 1:<8} "
+                    f"{outcome(record):<13} {reason}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract once, replay rules.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = commands.add_parser("extract", help="phase one: extract fields")
+    extract_parser.add_argument("--output", default="extracted.jsonl")
+    extract_parser.add_argument("--num-clients", type=int, default=3000)
+    extract_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    extract_parser.add_argument("--mrz", action="store_true", help="also read MRZs")
+    extract_parser.add_argument("--corpus", help="packed corpus file")
+
+    evaluate_parser = commands.add_parser("evaluate", help="phase two: replay rules")
+    evaluate_parser.add_argument("extraction", help="file written by extract")
+    evaluate_parser.add_argument(
+        "--rules", action="append", default=[], metavar="MODULE:CLASS"
+    )
+    evaluate_parser.add_argument("--baseline", default=BASELINE_RULES)
+    evaluate_parser.add_argument("--mrz", action="store_true")
+    evaluate_parser.add_argument("--show-changes", type=int, default=10, metavar="N")
+    args = parser.parse_args()
+
+    if args.command == "extract":
+        count = extract(
+            args.output, args.num_clients, args.workers, args.mrz, args.corpus
+        )
+        print(f"Extracted {count} clients into {args.output}")
+    else:
+        report = evaluate(args.extraction, args.rules, args.baseline, args.mrz)
+        print_report(report, args.baseline, args.show_changes)
@@ -0,0 +1,155 @@
+"""
+Sharded validation support.
+Partitions the client corpus deterministically across hosts and merges the
+partial results each shard writes back into a single summary.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+PARTIAL_FORMAT_VERSION = 1
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec of the form ``i/n`` (0-based shard index).
+
+    Args:
+        spec: Shard spec, e.g. "0/4" for the first of four shards
+    """
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}', expected i/n")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec '{spec}', need 0 <= i < n")
+
+    return index, count
+
+
+def shard_indices(num_clients: int, shard: Tuple[int, int]) -> range:
+    """Client indices owned by a shard: every n-th index starting at i."""
+    index, count = shard
+    return range(index, num_clients, count)
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute validation statistics from per-client records.
+
+    Args:
+        records: Records with boolean "result" and "expected" keys
+    """
+    total = success = false_positives = false_negatives = deadline_hits = 0
+    seconds = 0.0
+
+    for record in records:
+        result, expected = record["result"], record["expected"]
+        total += 1
+        success += result == expected
+        false_negatives += int(not result and expected)
+        false_positives += int(result and not expected)
+        seconds += record.get("seconds", 0.0)
+        deadline_hits += int(bool(record.get("deadline_hit")))
+
+    return {
+        "total": total,
+        "success": success,
+        "false_negatives": false_negatives,
+        "false_positives": false_positives,
+        "accuracy": success / total * 100 if total else 0.0,
+        "seconds": seconds,
+        "deadline_hits": deadline_hits,
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    """Print validation statistics in the run_validation format."""
+    print("\n=== Validation Summary ===")
+    print(f"Total Clients     : {summary['total']}")
+    print(f"Correct Predictions: {summary['success']}")
+    print(f"False Negatives   : {summary['false_negatives']}")
+    print(f"False Positives   : {summary['false_positives']}")
+    if summary.get("deadline_hits"):
+        print(f"Deadline Hits     : {summary['deadline_hits']}")
+    print(f"Accuracy          : {summary['accuracy']:.2f}%\n")
+
+
+def write_partial(
+    path: str,
+    shard: Tuple[int, int],
+    num_clients: int,
+    records: List[Dict[str, Any]],
+) -> None:
+    """
+    Write a shard's per-client results to a mergeable JSON file.
+
+    The file is written next to its destination and renamed into place,
+    so readers on a shared filesystem never see a partial write.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    payload = {
+        "version": PARTIAL_FORMAT_VERSION,
+        "shard": list(shard),
+        "num_clients": num_clients,
+        "records": records,
+    }
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def merge_partials(
+    paths: List[str], allow_partial: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Load shard results and check they form one complete, consistent run.
+
+    Raises ValueError if any shard is missing, unless ``allow_partial``.
+
+    Args:
+        paths: Partial result files written by write_partial
+        allow_partial: Merge whatever shards are present, with a warning
+    """
+    seen_shards = set()
+    shard_count = num_clients = None
+    records: Dict[int, Dict[str, Any]] = {}
+
+    for path in paths:
+        with open(path, "r") as f:
+            payload = json.load(f)
+
+        if payload.get("version") != PARTIAL_FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported partial result version")
+
+        index, count = payload["shard"]
+        if shard_count is None:
+            shard_count, num_clients = count, payload["num_clients"]
+        elif (count, payload["num_clients"]) != (shard_count, num_clients):
+            raise ValueError(f"{path}: shard layout differs from other partials")
+
+        if index in seen_shards:
+            raise ValueError(f"{path}: shard {index}/{count} merged twice")
+        seen_shards.add(index)
+
+        for record in payload["records"]:
+            records[record["client"]] = record
+
+    if shard_count is not None:
+        missing = sorted(set(range(shard_count)) - seen_shards)
+        if missing and not allow_partial:
+            raise ValueError(
+                f"Missing shards {missing} of {shard_count}; "
+                "use --allow-partial to merge anyway"
+            )
+        if missing:
+            print(f"Warning: missing shards {missing} of {shard_count}")
+
+    return [records[client] for client in sorted(records)]
@@ -0,0 +1,209 @@
+"""
+Streaming JSON parser for game backend payloads.
+Parses a response body chunk by chunk and base64-decodes document fields
+straight into their destination files, so a payload carrying four encoded
+documents is never held in memory as a whole.
+"""
+
+import binascii
+import json
+from typing import Any, BinaryIO, Callable, Iterable, Optional, Tuple
+
+WHITESPACE = b" \t\r\n"
+SCALAR_END = b",}] \t\r\n"
+
+# JSON escapes that can legally appear inside a base64 string
+BASE64_ESCAPES = {b"\\/": b"/", b"\\n": b"", b"\\r": b""}
+
+# Marker for values that were streamed out instead of returned
+_SKIP = object()
+
+
+class _ByteReader:
+    """Pull-based reader over an iterable of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buf = b""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        """Append the next non-empty chunk; False at end of stream."""
+        for chunk in self._chunks:
+            if chunk:
+                self._buf = self._buf[self._pos :] + chunk
+                self._pos = 0
+                return True
+        return False
+
+    def _ensure(self, n: int) -> None:
+        """Make at least n unread bytes available."""
+        while len(self._buf) - self._pos < n:
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def peek(self) -> Optional[int]:
+        """Return the next non-whitespace byte without consuming it."""
+        while True:
+            while self._pos < len(self._buf):
+                if self._buf[self._pos] not in WHITESPACE:
+                    return self._buf[self._pos]
+                self._pos += 1
+            if not self._fill():
+                return None
+
+    def expect(self, char: bytes) -> None:
+        """Consume the next non-whitespace byte, which must be ``char``."""
+        if self.peek() != char[0]:
+            raise ValueError(f"Expected {char!r} in JSON stream")
+        self._pos += 1
+
+    def read_scalar(self) -> bytes:
+        """Read a number or literal token."""
+        token = b""
+        while True:
+            start = self._pos
+            while self._pos < len(self._buf) and self._buf[self._pos] not in SCALAR_END:
+                self._pos += 1
+            token += self._buf[start : self._pos]
+            if self._pos < len(self._buf) or not self._fill():
+                return token
+
+    def iter_string(self) -> Iterable[bytes]:
+        """
+        Yield the raw bytes of a JSON string, without the quotes.
+
+        Escape sequences are kept verbatim and never split across spans.
+        """
+        self.expect(b'"')
+        while True:
+            quote = self._buf.find(b'"', self._pos)
+            escape = self._buf.find(b"\\", self._pos)
+
+            if escape != -1 and (quote == -1 or escape < quote):
+                if escape > self._pos:
+                    yield self._buf[self._pos : escape]
+                    self._pos = escape
+                self._ensure(2)
+                length = 6 if self._buf[self._pos + 1 : self._pos + 2] == b"u" else 2
+                self._ensure(length)
+                yield self._buf[self._pos : self._pos + length]
+                self._pos += length
+            elif quote != -1:
+                if quote > self._pos:
+                    yield self._buf[self._pos : quote]
+                self._pos = quote + 1
+                return
+            else:
+                if self._pos < len(self._buf):
+                    yield self._buf[self._pos :]
+                    self._pos = len(self._buf)
+                if not self._fill():
+                    raise ValueError("Unterminated string in JSON stream")
+
+
+class _Base64Writer:
+    """Incrementally decode base64 text into a binary file."""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self._pending = b""
+
+    def write(self, data: bytes) -> None:
+        for escaped, plain in BASE64_ESCAPES.items():
+            data = data.replace(escaped, plain)
+        data = self._pending + data.translate(None, WHITESPACE)
+        usable = len(data) - len(data) % 4
+        if usable:
+            self.out.write(binascii.a2b_base64(data[:usable]))
+        self._pending = data[usable:]
+
+    def close(self) -> None:
+        if self._pending:
+            self.out.write(binascii.a2b_base64(self._pending + b"=="))
+        self.out.close()
+
+
+def parse_payload(
+    chunks: Iterable[bytes],
+    open_document: Callable[[str], BinaryIO],
+    document_fields: Iterable[str],
+    container: str = "client_data",
+) -> Optional[Any]:
+    """
+    Parse a JSON payload, streaming document fields into files.
+
+    String values at ``container.<field>`` for any of ``document_fields``
+    are base64-decoded into ``open_document(field)`` and left out of the
+    returned value; everything else is parsed normally.
+    Returns None if the body is empty.
+
+    Args:
+        chunks: Response body as an iterable of byte chunks
+        open_document: Opens the binary destination for a document field
+        document_fields: Names of the base64 document fields
+        container: Key of the object holding the documents
+    """
+    reader = _ByteReader(chunks)
+    if reader.peek() is None:
+        return None
+
+    streamed = {(container, field) for field in document_fields}
+    value = _parse_value(reader, (), streamed, open_document)
+
+    if reader.peek() is not None:
+        raise ValueError("Extra data after JSON payload")
+    return value
+
+
+def _parse_value(reader, path: Tuple[str, ...], streamed, open_document) -> Any:
+    """Recursive-descent parse of one JSON value."""
+    char = reader.peek()
+
+    if char == ord("{"):
+        reader.expect(b"{")
+        obj = {}
+        if reader.peek() == ord("}"):
+            reader.expect(b"}")
+            return obj
+        while True:
+            key = json.loads(b'"' + b"".join(reader.iter_string()) + b'"')
+            reader.expect(b":")
+            value = _parse_value(reader, path + (key,), streamed, open_document)
+            if value is not _SKIP:
+                obj[key] = value
+            if reader.peek() == ord(","):
+                reader.expect(b",")
+                continue
+            reader.expect(b"}")
+            return obj
+
+    if char == ord("["):
+        reader.expect(b"[")
+        items = []
+        if reader.peek() == ord("]"):
+            reader.expect(b"]")
+            return items
+        while True:
+            items.append(_parse_value(reader, path, streamed, open_document))
+            if reader.peek() == ord(","):
+                reader.expect(b",")
+                continue
+            reader.expect(b"]")
+            return items
+
+    if char == ord('"'):
+        if path in streamed:
+            writer = _Base64Writer(open_document(path[-1]))
+            try:
+                for span in reader.iter_string():
+                    writer.write(span)
+            finally:
+                writer.close()
+            return _SKIP
+        return json.loads(b'"' + b"".join(reader.iter_string()) + b'"')
+
+    if char is None:
+        raise ValueError("Unexpected end of JSON stream")
+
+    return json.loads(reader.read_scalar())
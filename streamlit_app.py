@@ -11,22 +11,33 @@ import streamlit as st
 
 from game_client import GameClient
 from classifier import Classifier
+from classifier_service import ServiceClient
+from document_bundle import DocumentBundle
+from workspace import Workspace
 import utils
 
 
 # Constants
-TMP_DIR = "tmp_client/"
 TITLE = "🧠 Julius Bär – Onboarding Quest"
 SUBTITLE = "Automate onboarding. Spot inconsistencies. Play smart."
 
 
 def initialize_session_state() -> None:
     """Initialize all session state variables if they don't exist."""
+    if "workspace" not in st.session_state:
+        # Private scratch space, removed when the browser session goes away
+        st.session_state.workspace = Workspace(prefix="ui-")
+
     if "client" not in st.session_state:
         st.session_state.client = GameClient()
 
     if "classifier" not in st.session_state:
-        st.session_state.classifier = Classifier()
+        # Use the warm classification service when one is configured
+        service_socket = os.getenv("CLASSIFIER_SOCKET")
+        if service_socket:
+            st.session_state.classifier = ServiceClient(service_socket)
+        else:
+            st.session_state.classifier = Classifier()
 
     if "score" not in st.session_state:
         st.session_state.score = 0
@@ -51,6 +62,11 @@ def reset_game() -> None:
     st.session_state.last_decision = None
 
 
+def tmp_dir() -> str:
+    """Scratch directory for the current client of this browser session."""
+    return st.session_state.workspace.makedirs("client")
+
+
 def display_client_info(docx_data: Dict[str, Any]) -> None:
     """
     Display client information in a formatted way.
@@ -94,12 +110,14 @@ def process_client() -> None:
         client_data = st.session_state.client.get_client_data()
         save_client_data(client_data)
 
-        docx_data = utils.parse_docx(os.path.join(TMP_DIR, "profile.docx"))
+        # Parsed once here and reused by the classifier
+        bundle = DocumentBundle(tmp_dir())
+        docx_data = bundle.docx_fields()
         st.session_state.last_client_data = docx_data
 
         # Classify client data
         with st.spinner("Scanning and classifying client..."):
-            decision = st.session_state.classifier.classify(TMP_DIR)
+            decision = st.session_state.classifier.classify(tmp_dir(), bundle=bundle)
             st.session_state.last_decision = decision
 
         # Submit decision and check if correct
@@ -130,16 +148,16 @@ def save_client_data(client_data: Dict[str, Any]) -> None:
     Args:
         client_data: Dictionary containing encoded client documents
     """
-    os.makedirs(TMP_DIR, exist_ok=True)
-    utils.save_passport_image(client_data, TMP_DIR)
-    utils.save_docx_file(client_data, TMP_DIR)
-    utils.save_pdf_file(client_data, TMP_DIR)
-    utils.save_description_txt(client_data, TMP_DIR)
+    client_dir = tmp_dir()
+    utils.save_passport_image(client_data, client_dir)
+    utils.save_docx_file(client_data, client_dir)
+    utils.save_pdf_file(client_data, client_dir)
+    utils.save_description_txt(client_data, client_dir)
 
 
 def display_rejection_reason() -> None:
     """Display the reason for rejecting a client if available."""
-    reject_reason_path = os.path.join(TMP_DIR, "reject_reason.txt")
+    reject_reason_path = os.path.join(tmp_dir(), "reject_reason.txt")
     if os.path.exists(reject_reason_path):
         try:
             with open(reject_reason_path, "r") as f:
@@ -170,9 +188,7 @@ def handle_correct_decision(decision: bool) -> None:
     )
 
     # Clean up temporary files
-    if os.path.exists(TMP_DIR):
-        shutil.rmtree(TMP_DIR)
-        os.makedirs(TMP_DIR, exist_ok=True)
+    shutil.rmtree(tmp_dir(), ignore_errors=True)
 
 
 def handle_incorrect_decision(decision: bool) -> None:
@@ -202,7 +218,6 @@ def main() -> None:
 
     # Initialize session state
     initialize_session_state()
-    os.makedirs(TMP_DIR, exist_ok=True)
 
     # Display game over screen or continue game
     if st.session_state.game_over:
@@ -2,22 +2,122 @@ from PyPDF2 import PdfReader
 from docx import Document
 import pytesseract
 from PIL import Image
+import io
+import json
+import multiprocessing
 import os
 import base64
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
 import unicodedata
 import cv2
+import numpy as np
+from functools import lru_cache
+
+# File name each base64 document field of client_data is saved under
+DOCUMENT_FILES = {
+    "passport": "passport.png",
+    "profile": "profile.docx",
+    "account": "account.pdf",
+    "description": "description.txt",
+}
+
+
+# OCR preprocessing parameters; ocr_tuner.py writes tuned values to
+# OCR_PROFILE_PATH, which extract_text picks up at runtime
+DEFAULT_OCR_PROFILE = {
+    "scale": 2,
+    "interpolation": "cubic",
+    "block_size": 9,
+    "c": 15,
+    "psm": 11,
+}
+OCR_PROFILE_PATH = os.getenv("OCR_PROFILE", "ocr_profile.json")
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "area": cv2.INTER_AREA,
+}
+
+
+# How often a running Tesseract process or isolated call checks for
+# cancellation (seconds)
+TESSERACT_POLL_INTERVAL = 0.05
+
+
+class Cancelled(Exception):
+    """Raised when a killable call is stopped because it was cancelled."""
+
+
+class OCRCancelled(Cancelled):
+    """Raised when a Tesseract run is killed because it was cancelled."""
+
+
+class MemoryReader(io.RawIOBase):
+    """Seekable read-only file object over a buffer, without copying it."""
+
+    def __init__(self, buffer, name="<memory>"):
+        self._buffer = memoryview(buffer).cast("B")
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._buffer) - self._pos)
+        b[:n] = self._buffer[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._buffer)}
+        self._pos = max(0, base[whence] + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def __repr__(self):
+        return self.name
+
+
+def open_source(source):
+    """Return a path unchanged, or wrap a bytes-like buffer in a MemoryReader."""
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    return MemoryReader(source)
+
+
+def read_grayscale(source):
+    """Load an image as grayscale from a path or a bytes-like buffer."""
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.imread(os.fspath(source), cv2.IMREAD_GRAYSCALE)
+    return cv2.imdecode(np.frombuffer(source, np.uint8), cv2.IMREAD_GRAYSCALE)
 
 
 def extract_pdf(pdf_path):
-    """Extract form fields from a PDF file."""
-    reader = PdfReader(pdf_path)
+    """Extract form fields from a PDF file (path or bytes-like buffer)."""
+    reader = PdfReader(open_source(pdf_path))
     fields = reader.get_fields()
     return {k: v.get("/V", None) for k, v in fields.items()}
 
 
 def parse_docx(doc_path):
-    """Extract personal information from a formatted Word document."""
-    doc = Document(doc_path)
+    """
+    Extract personal information from a formatted Word document.
+    Accepts a path or a bytes-like buffer.
+    """
+    doc = Document(open_source(doc_path))
 
     # Extract personal details from first table
     table = doc.tables[1]
@@ -64,21 +164,237 @@ def normalize_text(input_text):
     return "".join([char for char in nfkd_form if unicodedata.category(char) != "Mn"])
 
 
-def preprocess_image(image_path):
-    """Enhance image for better OCR performance."""
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    img = cv2.resize(img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+@lru_cache(maxsize=None)
+def load_ocr_profile(path=OCR_PROFILE_PATH):
+    """Load OCR parameters from a profile file, falling back to the defaults."""
+    profile = dict(DEFAULT_OCR_PROFILE)
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            profile.update(json.load(f).get("params", {}))
+    return profile
+
+
+def preprocess_image(image_path, profile=None):
+    """Enhance image (path or bytes-like buffer) for better OCR performance."""
+    return enhance_image(read_grayscale(image_path), profile)
+
+
+def enhance_image(img, profile=None):
+    """Upscale and binarize an already decoded grayscale image for OCR."""
+    profile = profile or load_ocr_profile()
+    if profile["scale"] != 1:
+        img = cv2.resize(
+            img,
+            None,
+            fx=profile["scale"],
+            fy=profile["scale"],
+            interpolation=INTERPOLATIONS[profile["interpolation"]],
+        )
     img = cv2.adaptiveThreshold(
-        img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, blockSize=9, C=15
+        img,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        blockSize=profile["block_size"],
+        C=profile["c"],
     )
     return img
 
 
-def extract_text(image_path):
-    """Extract text from an image using OCR."""
-    img = preprocess_image(image_path)
-    text = pytesseract.image_to_string(img, config="--psm 11")
-    return text
+def run_tesseract(img, config, timeout=None, cancel_event=None):
+    """
+    Run Tesseract on a preprocessed image.
+
+    The Tesseract process is killed when it runs over ``timeout`` (seconds),
+    raising TimeoutError, or as soon as ``cancel_event`` is set, raising
+    OCRCancelled.
+    """
+    if timeout is not None and timeout <= 0:
+        raise TimeoutError("OCR deadline already passed")
+    if cancel_event is not None and cancel_event.is_set():
+        raise OCRCancelled()
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    with tempfile.NamedTemporaryFile(suffix=".png") as image_file:
+        cv2.imwrite(image_file.name, img)
+        cmd = [pytesseract.pytesseract.tesseract_cmd, image_file.name, "stdout"]
+        try:
+            proc = subprocess.Popen(
+                cmd + shlex.split(config),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            raise pytesseract.TesseractNotFoundError()
+
+        with proc:
+            while True:
+                try:
+                    stdout, stderr = proc.communicate(timeout=TESSERACT_POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if cancel_event is not None and cancel_event.is_set():
+                    _kill(proc)
+                    raise OCRCancelled()
+                if deadline is not None and time.monotonic() >= deadline:
+                    _kill(proc)
+                    raise TimeoutError("Tesseract process timeout")
+
+    if proc.returncode:
+        raise pytesseract.TesseractError(
+            proc.returncode, stderr.decode(errors="replace").strip()
+        )
+    return stdout.decode("utf-8")
+
+
+def _kill(proc):
+    """Kill a Tesseract process and anything it spawned, then reap it."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    proc.communicate()
+
+
+def _isolated_worker(conn):
+    """Serve IsolatedPool calls received on ``conn`` until it is closed."""
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, fn(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Unpicklable result or exception
+            value = e if reply[0] else reply[1]
+            conn.send((False, RuntimeError(f"{type(value).__name__}: {value}")))
+
+
+class IsolatedPool:
+    """
+    Long-lived worker processes for calls that must be killable.
+
+    Workers come from the forkserver (spawn where it is unavailable), so
+    they are never forked from this multithreaded process, and each one
+    serves many calls. A worker whose call overruns or is cancelled is
+    killed and replaced with a fresh one.
+    """
+
+    def __init__(self):
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            # Workers fork from a server that already imported the parsers
+            self._context.set_forkserver_preload([__name__])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _start_worker(self):
+        conn, child_conn = self._context.Pipe()
+        proc = self._context.Process(
+            target=_isolated_worker, args=(child_conn,), daemon=True
+        )
+        proc.start()
+        child_conn.close()
+        return proc, conn
+
+    def _replace(self, worker):
+        """Kill a worker that may still be busy and keep a fresh one idle."""
+        proc, conn = worker
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        conn.close()
+        replacement = self._start_worker()
+        with self._lock:
+            self._idle.append(replacement)
+
+    def call(self, fn, *args, timeout=None, cancel_event=None):
+        """
+        Run ``fn(*args)`` in a worker process.
+
+        The worker is killed when the call runs over ``timeout`` (seconds),
+        raising TimeoutError, or as soon as ``cancel_event`` is set, raising
+        Cancelled. Exceptions raised by ``fn`` are re-raised here. ``fn``,
+        its arguments and its result must be picklable.
+        """
+        if timeout is not None and timeout <= 0:
+            raise TimeoutError("deadline already passed")
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        worker = worker or self._start_worker()
+        proc, conn = worker
+        try:
+            conn.send((fn, args))
+            while not conn.poll(TESSERACT_POLL_INTERVAL):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise Cancelled()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("isolated call timeout")
+                if not proc.is_alive() and not conn.poll():
+                    raise RuntimeError(f"worker process died ({proc.exitcode})")
+            ok, value = conn.recv()
+        except BaseException:
+            self._replace(worker)
+            raise
+
+        with self._lock:
+            self._idle.append(worker)
+        if not ok:
+            raise value
+        return value
+
+
+_isolated_pool = None
+_isolated_pool_lock = threading.Lock()
+
+
+def call_in_process(fn, *args, timeout=None, cancel_event=None):
+    """
+    Run ``fn(*args)`` in a killable worker process; see IsolatedPool.call.
+
+    Used for parsers that cannot be interrupted in a thread. All callers
+    share one pool, started on first use.
+    """
+    global _isolated_pool
+    with _isolated_pool_lock:
+        if _isolated_pool is None:
+            _isolated_pool = IsolatedPool()
+    return _isolated_pool.call(fn, *args, timeout=timeout, cancel_event=cancel_event)
+
+
+def extract_text(image_path, cancel_event=None, timeout=None, profile=None):
+    """
+    Extract text from an image using OCR.
+
+    If ``cancel_event`` is set, Tesseract is skipped or killed and an empty
+    string is returned. ``timeout`` bounds the Tesseract run, see
+    run_tesseract. ``profile`` overrides the OCR parameters loaded from
+    OCR_PROFILE_PATH.
+    """
+    profile = profile or load_ocr_profile()
+    img = preprocess_image(image_path, profile)
+    try:
+        return run_tesseract(
+            img,
+            config=f"--psm {profile['psm']}",
+            timeout=timeout,
+            cancel_event=cancel_event,
+        )
+    except OCRCancelled:
+        return ""
 
 
 def save_passport_image(json_data, output_dir, filename="passport.png"):
@@ -0,0 +1,68 @@
+"""
+Isolated scratch workspaces.
+Every game player or UI session gets its own private directory, in memory
+(/dev/shm) where available, that is removed when the session is closed,
+garbage collected or the interpreter exits.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional
+
+# tmpfs mount used for in-memory workspaces on Linux
+SHM_DIR = "/dev/shm"
+
+
+def default_base_dir() -> Optional[str]:
+    """In-memory tmpfs if writable, otherwise the system temp directory."""
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return SHM_DIR
+    return None
+
+
+class Workspace:
+    """
+    Private scratch directory for one session.
+
+    Can be used as a context manager; cleanup also runs automatically when
+    the object is garbage collected or at interpreter exit.
+    """
+
+    def __init__(self, prefix: str = "bbt-", base_dir: Optional[str] = None):
+        """
+        Create the workspace directory.
+
+        Args:
+            prefix: Prefix of the directory name, to tell sessions apart
+            base_dir: Parent directory; defaults to default_base_dir()
+        """
+        self.root = tempfile.mkdtemp(prefix=prefix, dir=base_dir or default_base_dir())
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.root, ignore_errors=True
+        )
+
+    def path(self, *parts: str) -> str:
+        """Path inside the workspace."""
+        return os.path.join(self.root, *parts)
+
+    def makedirs(self, *parts: str) -> str:
+        """Create a directory inside the workspace and return its path."""
+        path = self.path(*parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def cleanup(self) -> None:
+        """Remove the workspace and everything in it."""
+        self._finalizer()
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()